@@ -0,0 +1,31 @@
+"""
+Command line entry point:
+
+    python -m pypuz serve --port 8080 --workers 4
+"""
+import argparse
+import sys
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pypuz')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run the local conversion service')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--workers', type=int, default=2, help='number of worker processes')
+    serve.add_argument('--queue-size', type=int, default=16,
+                       help='requests that may wait for a worker before new ones get 503')
+    serve.add_argument('--cache-size', type=int, default=64, help='parsed puzzles cached per worker')
+    serve.add_argument('--max-body-size', type=int, default=8 * 1024 * 1024)
+    serve.add_argument('--verbose', action='store_true', help='log each request')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from .server import serve as runServer
+        runServer(args.host, args.port, workers=args.workers, queueSize=args.queue_size,
+                  cacheSize=args.cache_size, maxBodySize=args.max_body_size, quiet=not args.verbose)
+    return 0
+#END main()
+
+if __name__ == '__main__':
+    sys.exit(main())
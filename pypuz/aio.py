@@ -0,0 +1,126 @@
+"""
+asyncio-friendly loading and saving.
+
+File I/O runs on the event loop's default (thread) executor, while parsing
+and encoding -- the CPU-bound part -- run on a configurable executor. With a
+ProcessPoolExecutor, only bytes and the finished Puzzle cross the process
+boundary. A semaphore caps how many parses or encodes run at once, so a
+burst of requests queues up instead of flooding the executor; a request
+cancelled while it waits never reaches the executor at all.
+
+    from concurrent.futures import ProcessPoolExecutor
+    aio.configure(executor=ProcessPoolExecutor(4), maxConcurrency=8)
+    puzzle = await Puzzle.aload('x.jpz')
+    await puzzle.asave('x.puz')
+"""
+import asyncio
+import os
+import stat
+import uuid
+import weakref
+
+from .pypuz import Puzzle, formatFromFilename
+
+# The executor for parsing and encoding (None means the loop's default)
+_executor = None
+# The maximum number of parses/encodes in flight per event loop
+_maxConcurrency = None
+_semaphores = weakref.WeakKeyDictionary()
+
+def configure(executor=None, maxConcurrency=None):
+    """
+    Set the default executor for parsing and encoding, and the maximum
+    number of them running at once (None for no limit).
+    """
+    global _executor, _maxConcurrency
+    _executor = executor
+    _maxConcurrency = maxConcurrency
+    _semaphores.clear()
+#END configure()
+
+class _NoLimit:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+def _limiter():
+    """Return the semaphore for the running loop"""
+    if not _maxConcurrency:
+        return _NoLimit()
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(_maxConcurrency)
+    return sem
+#END _limiter()
+
+# These run on the executor, so they must be picklable module-level functions
+def _parse(data, fmt):
+    return Puzzle().fromData(data, fmt)
+
+def _encode(puzzle, fmt):
+    return puzzle.toData(fmt)
+
+def _readFile(filename):
+    with open(filename, 'rb') as fid:
+        return fid.read()
+
+def _createTemporary(filename):
+    """
+    Create a new, empty file next to filename; return (fd, path).
+    Unlike mkstemp(), the file gets the same mode open() would give it
+    (0666 less the umask).
+    """
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    while True:
+        tmp = os.path.join(dirname, f'.{basename}.{uuid.uuid4().hex[:12]}.tmp')
+        try:
+            return os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0), 0o666), tmp
+        except FileExistsError:
+            continue
+
+def _writeFile(filename, data):
+    # write to a temporary file first, so a failed save never leaves a partial file
+    fd, tmp = _createTemporary(filename)
+    try:
+        with os.fdopen(fd, 'wb') as fid:
+            fid.write(data)
+        # keep the mode of a file being replaced
+        try:
+            os.chmod(tmp, stat.S_IMODE(os.stat(filename).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+#END _writeFile()
+
+async def _run(executor, fxn, *args):
+    loop = asyncio.get_running_loop()
+    async with _limiter():
+        return await loop.run_in_executor(executor or _executor, fxn, *args)
+
+async def aloadData(data, fmt, executor=None):
+    """Parse file contents (bytes) in the given format without blocking the loop"""
+    return await _run(executor, _parse, data, fmt)
+
+async def aload(filename, fmt=None, executor=None):
+    """Read and parse a file without blocking the loop"""
+    fmt = fmt or formatFromFilename(filename)
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(None, _readFile, filename)
+    return await aloadData(data, fmt, executor=executor)
+
+async def aencode(puzzle, fmt, executor=None):
+    """Encode a puzzle in the given format (as bytes) without blocking the loop"""
+    return await _run(executor, _encode, puzzle, fmt)
+
+async def asave(puzzle, filename, fmt=None, executor=None):
+    """Encode and write a puzzle without blocking the loop"""
+    fmt = fmt or formatFromFilename(filename)
+    data = await aencode(puzzle, fmt, executor=executor)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _writeFile, filename, data)
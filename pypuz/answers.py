@@ -0,0 +1,225 @@
+"""
+A corpus-wide index of crossword answers, with wildcard pattern queries.
+
+Answers are taken from the grid entries of each puzzle and stored in a
+SQLite file, along with how often each one appears. For pattern queries,
+the answers with each number of squares are numbered, and every (position,
+square) pair gets a bitset of the answers that have that square there; a
+pattern like ?A?E?? is then just the AND of two bitsets. A rebus square
+counts as one square (so a rebus answer is found by a pattern as long as
+its slot) and is matched by a wildcard. The index can be updated as new
+puzzles arrive.
+
+    with AnswerIndex('answers.db') as index:
+        index.addPuzzle(puzzle, source='nyt-2024-01-01')
+        index.match('?A?E??')
+        index.count('OREO')
+"""
+import sqlite3
+
+WILDCARDS = '?.'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    answer TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (answer, length)
+);
+CREATE INDEX IF NOT EXISTS answers_by_length ON answers (length, slot);
+CREATE TABLE IF NOT EXISTS bitsets (
+    length INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    letter TEXT NOT NULL,
+    bits BLOB NOT NULL,
+    PRIMARY KEY (length, pos, letter)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY
+);
+"""
+
+def puzzleAnswers(puzzle):
+    """Return the answers (across, then down) in a puzzle's grid"""
+    grid = puzzle.grid
+    answers = []
+    for entries in (grid.acrossEntries(), grid.downEntries()):
+        for entry in entries.values():
+            word = entry['word'].upper()
+            if word:
+                answers.append(word)
+    return answers
+#END puzzleAnswers()
+
+def puzzleAnswerSquares(puzzle):
+    """
+    Return the answers (across, then down) in a puzzle's grid as tuples
+    of squares, e.g. ('S', 'TAR', 'T') for an entry with a rebus square
+    """
+    grid = puzzle.grid
+    answers = []
+    for entries in (grid.acrossEntries(), grid.downEntries()):
+        for entry in entries.values():
+            squares = tuple((grid.letterAt(x, y) or '').upper() for x, y in entry['cells'])
+            if any(squares):
+                answers.append(squares)
+    return answers
+#END puzzleAnswerSquares()
+
+def _setBit(bits, slot):
+    """Set a bit in a little-endian bitset held in a bytearray"""
+    byte = slot >> 3
+    if byte >= len(bits):
+        bits.extend(bytes(byte + 1 - len(bits)))
+    bits[byte] |= 1 << (slot & 7)
+
+class _LengthBucket:
+    """
+    All the answers with one number of squares, with their (position,
+    square) bitsets as bytearrays
+    """
+    def __init__(self, answers, bitsets):
+        self.answers = answers
+        self.bitsets = bitsets
+        # bitsets changed since the last commit
+        self.dirty = set()
+
+class AnswerIndex:
+    """
+    A persistent answer index, stored in a SQLite file.
+    Use ':memory:' for an index that is not saved.
+    """
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # length -> _LengthBucket, loaded as needed
+        self._buckets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _bucket(self, length):
+        bucket = self._buckets.get(length)
+        if bucket is None:
+            rows = self.db.execute('SELECT answer FROM answers WHERE length = ? ORDER BY slot', (length,))
+            answers = [row[0] for row in rows]
+            rows = self.db.execute('SELECT pos, letter, bits FROM bitsets WHERE length = ?', (length,))
+            bitsets = {(pos, letter): bytearray(bits) for pos, letter, bits in rows}
+            bucket = self._buckets[length] = _LengthBucket(answers, bitsets)
+        return bucket
+
+    def hasSource(self, source):
+        """Whether a puzzle with this source id has already been indexed"""
+        row = self.db.execute('SELECT 1 FROM sources WHERE source = ?', (source,)).fetchone()
+        return row is not None
+
+    def addAnswers(self, answers):
+        """
+        Add a list of answers to the index. Each answer is either a string
+        (one letter per square) or a tuple of squares, as given by
+        puzzleAnswerSquares(). An answer is stored under its letters and
+        its number of squares, so a rebus START (S, TAR, T) and a plain
+        START are counted separately.
+        """
+        counts = {}
+        for answer in answers:
+            squares = tuple(answer)
+            counts[squares] = counts.get(squares, 0) + 1
+        for squares, n in counts.items():
+            answer = ''.join(squares)
+            cur = self.db.execute('UPDATE answers SET count = count + ? WHERE answer = ? AND length = ?',
+                                  (n, answer, len(squares)))
+            if cur.rowcount:
+                continue
+            # a new answer: give it the next slot for its number of squares and set its bits
+            bucket = self._bucket(len(squares))
+            slot = len(bucket.answers)
+            bucket.answers.append(answer)
+            for pos, square in enumerate(squares):
+                key = (pos, square)
+                bits = bucket.bitsets.get(key)
+                if bits is None:
+                    bits = bucket.bitsets[key] = bytearray()
+                _setBit(bits, slot)
+                bucket.dirty.add(key)
+            self.db.execute('INSERT INTO answers (answer, length, slot, count) VALUES (?, ?, ?, ?)',
+                            (answer, len(squares), slot, n))
+    #END addAnswers()
+
+    def addPuzzle(self, puzzle, source=None):
+        """
+        Add the answers in a puzzle to the index.
+        If a source id is given and it has been indexed before, the puzzle
+        is skipped; returns whether the puzzle was added.
+        """
+        if source is not None:
+            if self.hasSource(source):
+                return False
+            self.db.execute('INSERT INTO sources (source) VALUES (?)', (source,))
+        self.addAnswers(puzzleAnswerSquares(puzzle))
+        return True
+
+    def addPuzzles(self, puzzles):
+        """Add (source, puzzle) pairs and commit; returns the number added"""
+        added = sum(self.addPuzzle(puzzle, source=source) for source, puzzle in puzzles)
+        self.commit()
+        return added
+
+    def commit(self):
+        """Write any changed bitsets and commit"""
+        for length, bucket in self._buckets.items():
+            if bucket.dirty:
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO bitsets (length, pos, letter, bits) VALUES (?, ?, ?, ?)',
+                    [(length, pos, letter, bytes(bucket.bitsets[(pos, letter)]))
+                     for pos, letter in bucket.dirty])
+                bucket.dirty = set()
+        self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    def match(self, pattern, wildcards=WILDCARDS):
+        """
+        Return the answers matching a pattern such as '?A?E??',
+        where '?' or '.' match any single square (including a rebus square)
+        """
+        pattern = pattern.upper()
+        bucket = self._bucket(len(pattern))
+        bits = (1 << len(bucket.answers)) - 1
+        for pos, letter in enumerate(pattern):
+            if letter not in wildcards:
+                bits &= int.from_bytes(bucket.bitsets.get((pos, letter), b''), 'little')
+                if not bits:
+                    return []
+        matches = []
+        while bits:
+            low = bits & -bits
+            matches.append(bucket.answers[low.bit_length() - 1])
+            bits ^= low
+        return matches
+    #END match()
+
+    def count(self, answer, length=None):
+        """
+        How many times an answer has appeared in slots of the given number
+        of squares; with no length, in slots of any length (e.g. START
+        both as five squares and as a rebus)
+        """
+        if length is None:
+            row = self.db.execute('SELECT SUM(count) FROM answers WHERE answer = ?', (answer.upper(),)).fetchone()
+        else:
+            row = self.db.execute('SELECT count FROM answers WHERE answer = ? AND length = ?',
+                                  (answer.upper(), length)).fetchone()
+        return (row[0] or 0) if row else 0
+
+    def counts(self, answers, length=None):
+        """Return a dictionary of answer -> number of appearances (see count())"""
+        return {a: self.count(a, length) for a in answers}
+#END class AnswerIndex
@@ -0,0 +1,147 @@
+"""
+Streaming iteration over directories and archives of puzzle files.
+
+Directories are walked, and zip and tar files are read member by member,
+without extracting anything to disk. Puzzles are parsed and yielded one at
+a time, so memory stays constant however large the archive; with a pool of
+workers, at most readAhead files are held in memory while they are parsed.
+
+    for source, puzzle in iterPuzzles(['dump.tar.gz', 'more/'], workers=4):
+        ...
+    for info in iterPuzzles(['dump.zip'], metadataOnly=True):
+        print(info.source, info.title)
+"""
+import os
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .file_types import puz, ipuz, cfp, jpz
+from .pypuz import Puzzle, EXTENSIONS
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+class PuzzleInfo:
+    """
+    A lightweight, metadata-only record for a puzzle file.
+    source, format, size (in bytes), kind, title, author, copyright, width, height
+    """
+    FIELDS = ('kind', 'title', 'author', 'copyright', 'width', 'height')
+
+    def __init__(self, source, format, size, **metadata):
+        self.source = source
+        self.format = format
+        self.size = size
+        for field in self.FIELDS:
+            setattr(self, field, metadata.get(field))
+
+    def __repr__(self):
+        return f"PuzzleInfo({self.source!r}, {self.title!r})"
+#END class PuzzleInfo
+
+def _format(name):
+    """Return the puzzle format of a file name, or None"""
+    return EXTENSIONS.get(os.path.splitext(name)[1].lower())
+
+def _isArchive(name):
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def iterFiles(paths):
+    """
+    Yield (source, format, data) for every puzzle file in the given
+    directories, archives and files. Archive members have a source like
+    'dump.zip/2024/jan01.puz'. Files with unknown extensions are skipped.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        path = os.fspath(path)
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                yield from iterFiles(os.path.join(dirpath, f) for f in sorted(filenames))
+        elif _isArchive(path) and zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    fmt = _format(info.filename)
+                    if fmt and not info.is_dir():
+                        yield f'{path}/{info.filename}', fmt, zf.read(info)
+        elif _isArchive(path):
+            # stream mode reads members in order, without seeking
+            with tarfile.open(path, 'r|*') as tf:
+                for member in tf:
+                    fmt = _format(member.name)
+                    if fmt and member.isfile():
+                        yield f'{path}/{member.name}', fmt, tf.extractfile(member).read()
+        else:
+            fmt = _format(path)
+            if fmt:
+                with open(path, 'rb') as fid:
+                    yield path, fmt, fid.read()
+#END iterFiles()
+
+def readInfo(source, fmt, data):
+    """Return a PuzzleInfo for a file's contents, without building a Puzzle"""
+    if fmt == 'puz':
+        pz = puz.load(data)
+        kind = 'diagramless' if pz.puzzletype == puz.PuzzleType.Diagramless else 'crossword'
+        return PuzzleInfo(source, fmt, len(data), kind=kind, title=pz.title, author=pz.author,
+                          copyright=pz.copyright, width=pz.width, height=pz.height)
+    readers = {'ipuz': ipuz.read_ipuz_data, 'jpz': jpz.read_jpz_data, 'cfp': cfp.read_cfp_data}
+    metadata = readers[fmt](data)['metadata']
+    return PuzzleInfo(source, fmt, len(data), **metadata)
+#END readInfo()
+
+def _parse(source, fmt, data, metadataOnly):
+    """Parse one file; this runs on the workers, so it must be picklable"""
+    if metadataOnly:
+        return readInfo(source, fmt, data)
+    return source, Puzzle().fromData(data, fmt)
+
+def iterPuzzles(paths, metadataOnly=False, workers=0, readAhead=16, executor=None, onError='raise'):
+    """
+    Yield (source, Puzzle) pairs -- or PuzzleInfo records if metadataOnly --
+    for every puzzle file in the given directories, archives and files,
+    in order.
+
+    With workers > 0 (or an executor), files are parsed in parallel, with at
+    most readAhead of them read but not yet yielded. onError is 'raise' or
+    'skip' (files that fail to parse are left out).
+    """
+    files = iterFiles(paths)
+    if not workers and executor is None:
+        for source, fmt, data in files:
+            try:
+                result = _parse(source, fmt, data, metadataOnly)
+            except Exception:
+                if onError == 'raise':
+                    raise
+                continue
+            yield result
+        return
+
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for source, fmt, data in files:
+            pending.append(pool.submit(_parse, source, fmt, data, metadataOnly))
+            while len(pending) >= readAhead:
+                yield from _collect(pending.popleft(), onError)
+        while pending:
+            yield from _collect(pending.popleft(), onError)
+    finally:
+        for f in pending:
+            f.cancel()
+        if executor is None:
+            pool.shutdown()
+#END iterPuzzles()
+
+def _collect(future, onError):
+    try:
+        result = future.result()
+    except Exception:
+        if onError == 'raise':
+            raise
+        return
+    yield result
@@ -0,0 +1,218 @@
+"""
+Answer checking for crossword puzzles.
+
+A Checker lays the grid out as flat, row-major arrays once, then keeps
+running counts of filled and incorrect cells for every entry. A full check
+is a single pass over the grid; after that, changing a few cells only
+re-checks those cells and the entries that cross them.
+"""
+
+# Results of checking a single cell
+CORRECT = 'correct'
+INCORRECT = 'incorrect'
+
+class CheckResult:
+    """
+    The result of checking a grid against its solution.
+    incorrectCells (list of [x, y] -- filled cells that don't match the solution)
+    incorrectEntries (list of (title, number) -- entries with an incorrect cell)
+    completeEntries (list of (title, number) -- entries with every cell filled)
+    isComplete (boolean -- every checkable cell is filled)
+    isCorrect (boolean -- every checkable cell is filled and correct)
+    """
+    def __init__(self, incorrectCells, incorrectEntries, completeEntries, isComplete):
+        self.incorrectCells = incorrectCells
+        self.incorrectEntries = incorrectEntries
+        self.completeEntries = completeEntries
+        self.isComplete = isComplete
+        self.isCorrect = isComplete and not incorrectCells
+
+    def __repr__(self):
+        return (f"CheckResult(incorrectCells={self.incorrectCells}, "
+                f"incorrectEntries={self.incorrectEntries}, isCorrect={self.isCorrect})")
+#END class CheckResult
+
+class Checker:
+    """
+    Incremental answer checker for a Puzzle.
+    Cell values are read from the puzzle's Cell objects; after changing a
+    cell's value either call update() with its coordinates, or use
+    setValue() which does both.
+
+    If rebusFirstLetter is True, a rebus square is also considered correct
+    when it contains just the first letter of its solution (as in .puz files).
+    """
+    def __init__(self, puzzle, rebusFirstLetter=False):
+        grid = puzzle.grid
+        self.width, self.height = grid.width, grid.height
+        self.rebusFirstLetter = rebusFirstLetter
+        n = self.width * self.height
+
+        # Row-major cells; None for blocks, voids and missing cells
+        self.cells = [None] * n
+        for c in grid.cells:
+            i = c.y * self.width + c.x
+            if self.cells[i] is None and not (c.isBlock or c.isEmpty):
+                self.cells[i] = c
+        self.solutions = [(c.solution or '').upper() if c else '' for c in self.cells]
+
+        # Entries as (title, number, [offsets]), plus offset -> entry indices
+        self.entries = []
+        self.cellEntries = [[] for _ in range(n)]
+        for title, number, cells in self._entryCells(puzzle):
+            offsets = []
+            for x, y in cells:
+                i = y * self.width + x
+                if 0 <= x < self.width and 0 <= y < self.height and self.cells[i] is not None:
+                    offsets.append(i)
+            k = len(self.entries)
+            for i in offsets:
+                self.cellEntries[i].append(k)
+            self.entries.append((title, number, offsets))
+        self.entryIndex = {(title, number): k for k, (title, number, _) in enumerate(self.entries)}
+
+        self.refresh()
+
+    @staticmethod
+    def _entryCells(puzzle):
+        """Yield (title, number, cells) for each entry, preferring the clue cells"""
+        if puzzle.clues:
+            for clueList in puzzle.clues:
+                for clue in clueList['clues']:
+                    if clue.cells:
+                        yield clueList['title'], clue.number, clue.cells
+        else:
+            for title, entries in (('Across', puzzle.grid.acrossEntries()), ('Down', puzzle.grid.downEntries())):
+                for number, entry in entries.items():
+                    yield title, number, entry['cells']
+    #END _entryCells()
+
+    def _offset(self, x, y):
+        """Return the row-major offset of (x, y), which must be in the grid"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f'Cell ({x}, {y}) is outside the {self.width}x{self.height} grid')
+        return y * self.width + x
+
+    def _cellState(self, i):
+        """Return (filled, wrong) for the cell at offset i"""
+        c = self.cells[i]
+        if c is None or not c.value:
+            return False, False
+        solution = self.solutions[i]
+        if not solution:
+            # nothing to check against
+            return True, False
+        value = c.value.upper()
+        if value == solution:
+            return True, False
+        if self.rebusFirstLetter and len(solution) > 1 and value == solution[0]:
+            return True, False
+        return True, True
+    #END _cellState()
+
+    def refresh(self):
+        """Re-check the whole grid in one pass"""
+        n = len(self.cells)
+        self.filled = bytearray(n)
+        self.wrong = bytearray(n)
+        self.wrongCells = set()
+        self.numCheckable = sum(1 for c in self.cells if c is not None)
+        self.numFilled = 0
+        for i in range(n):
+            filled, wrong = self._cellState(i)
+            if filled:
+                self.filled[i] = 1
+                self.numFilled += 1
+            if wrong:
+                self.wrong[i] = 1
+                self.wrongCells.add(i)
+        self.entryFilled = []
+        self.entryWrong = []
+        self.incorrectEntries = set()
+        self.completeEntries = set()
+        for k, (_, _, offsets) in enumerate(self.entries):
+            numFilled = sum(self.filled[i] for i in offsets)
+            numWrong = sum(self.wrong[i] for i in offsets)
+            self.entryFilled.append(numFilled)
+            self.entryWrong.append(numWrong)
+            if numWrong:
+                self.incorrectEntries.add(k)
+            if offsets and numFilled == len(offsets):
+                self.completeEntries.add(k)
+        return self.result()
+    #END refresh()
+
+    def update(self, cells):
+        """
+        Re-check only the given [x, y] cells and the entries crossing them.
+        Returns the updated CheckResult; raises ValueError for a cell
+        outside the grid.
+        """
+        # check every coordinate first, so a bad one doesn't leave a partial update
+        offsets = [self._offset(x, y) for x, y in cells]
+        for i in offsets:
+            if self.cells[i] is None:
+                continue
+            filled, wrong = self._cellState(i)
+            dFilled = int(filled) - self.filled[i]
+            dWrong = int(wrong) - self.wrong[i]
+            if not (dFilled or dWrong):
+                continue
+            self.filled[i], self.wrong[i] = int(filled), int(wrong)
+            self.numFilled += dFilled
+            if wrong:
+                self.wrongCells.add(i)
+            else:
+                self.wrongCells.discard(i)
+            for k in self.cellEntries[i]:
+                self.entryFilled[k] += dFilled
+                self.entryWrong[k] += dWrong
+                if self.entryWrong[k]:
+                    self.incorrectEntries.add(k)
+                else:
+                    self.incorrectEntries.discard(k)
+                if self.entryFilled[k] == len(self.entries[k][2]):
+                    self.completeEntries.add(k)
+                else:
+                    self.completeEntries.discard(k)
+        return self.result()
+    #END update()
+
+    def setValue(self, x, y, value):
+        """Set the value of the cell at (x, y) and re-check it"""
+        c = self.cells[self._offset(x, y)]
+        if c is None:
+            raise ValueError(f'Cell ({x}, {y}) is not a fillable square')
+        c.value = value
+        return self.update([(x, y)])
+
+    def checkCell(self, x, y):
+        """Return CORRECT, INCORRECT or None (unfilled or not a fillable square)"""
+        i = self._offset(x, y)
+        if not self.filled[i]:
+            return None
+        return INCORRECT if self.wrong[i] else CORRECT
+
+    def checkEntry(self, title, number):
+        """
+        Return a CheckResult for a single entry, e.g. checkEntry('Across', '1')
+        """
+        k = self.entryIndex[(title, str(number))]
+        offsets = self.entries[k][2]
+        incorrectCells = [[i % self.width, i // self.width] for i in offsets if self.wrong[i]]
+        isComplete = self.entryFilled[k] == len(offsets)
+        key = (title, self.entries[k][1])
+        return CheckResult(incorrectCells,
+                           [key] if k in self.incorrectEntries else [],
+                           [key] if isComplete else [],
+                           isComplete)
+
+    def result(self):
+        """Return a CheckResult for the whole puzzle"""
+        w = self.width
+        incorrectCells = [[i % w, i // w] for i in sorted(self.wrongCells)]
+        incorrectEntries = [self.entries[k][:2] for k in sorted(self.incorrectEntries)]
+        completeEntries = [self.entries[k][:2] for k in sorted(self.completeEntries)]
+        return CheckResult(incorrectCells, incorrectEntries, completeEntries,
+                           self.numFilled == self.numCheckable)
+#END class Checker
@@ -0,0 +1,173 @@
+"""
+Copy-on-write clones of a Puzzle.
+
+A clone shares everything with its base puzzle -- cells, styles, numbering,
+metadata and clues -- except for the filled values, which live in one flat
+list per clone. Anything else that is changed through the clone is copied
+first, so the base puzzle is never modified.
+"""
+import copy
+
+from .pypuz import CellStyle, Grid, Puzzle
+
+def _positions(grid):
+    """
+    Return a dictionary of (x, y) -> index into grid.cells.
+    This is computed once per base grid and shared by all of its clones.
+    """
+    positions = getattr(grid, '_clonePositions', None)
+    if positions is None:
+        positions = {}
+        for i, c in enumerate(grid.cells):
+            positions.setdefault((c.x, c.y), i)
+        grid._clonePositions = positions
+    return positions
+#END _positions()
+
+class FillCell:
+    """
+    A view of one cell of a PuzzleClone.
+    Reading an attribute reads the base cell (or the clone's private copy);
+    setting "value" writes to the clone's fill, and setting anything else
+    copies the cell for this clone first.
+    """
+    __slots__ = ('_clone', '_i')
+
+    def __init__(self, clone, i):
+        object.__setattr__(self, '_clone', clone)
+        object.__setattr__(self, '_i', i)
+
+    def __getattr__(self, name):
+        return getattr(self._clone._cell(self._i), name)
+
+    def __setattr__(self, name, value):
+        if name == 'value':
+            self._clone._fill[self._i] = value
+        elif getattr(self._clone._cell(self._i), name, None) != value:
+            setattr(self._clone._editCell(self._i), name, value)
+
+    @property
+    def value(self):
+        return self._clone._fill[self._i]
+
+    @property
+    def style(self):
+        # changes to the style are stored on the clone's copy of the cell
+        return CellStyle(self._clone._cell(self._i).sharedStyle, self)
+
+    def setStyle(self, **changes):
+        self._clone._editCell(self._i).setStyle(**changes)
+
+    def __repr__(self):
+        return f"Cell({{({self.x}, {self.y}), {self.solution}}})"
+#END class FillCell
+
+class CloneGrid(Grid):
+    """
+    The grid of a PuzzleClone: the base grid's cells seen through FillCell views
+    """
+    def __init__(self, clone, base):
+        self._clone = clone
+        self._positions = _positions(base)
+        self.width = base.width
+        self.height = base.height
+        self._views = None
+
+    @property
+    def cells(self):
+        # the views hold no state of their own, so one list serves for the clone's lifetime
+        if self._views is None:
+            self._views = [FillCell(self._clone, i) for i in range(len(self._clone._fill))]
+        return self._views
+
+    def cellAt(self, x, y):
+        i = self._positions.get((x, y))
+        if i is not None:
+            return FillCell(self._clone, i)
+#END class CloneGrid
+
+class PuzzleClone(Puzzle):
+    """
+    A cheap, copy-on-write copy of a Puzzle, e.g. for one solving session.
+
+    The metadata and clues are shared with the base puzzle: call
+    editMetadata() or editClues() to get a private copy before changing them.
+    Cells may be changed freely through grid.cellAt() or grid.cells.
+    """
+    def __init__(self, base):
+        if isinstance(base, PuzzleClone):
+            # a clone of a clone shares the same base
+            self._base = base._base
+            self._fill = list(base._fill)
+            self._cells = {i: copy.copy(c) for i, c in base._cells.items()}
+            self._metadata = copy.copy(base._metadata) if base._metadata is not None else None
+            self._clues = copy.deepcopy(base._clues) if base._clues is not None else None
+        else:
+            self._base = base
+            self._fill = [c.value for c in base.grid.cells]
+            # private copies of edited cells
+            self._cells = {}
+            self._metadata, self._clues = None, None
+        self._grid = CloneGrid(self, self._base.grid)
+
+    def _cell(self, i):
+        c = self._cells.get(i)
+        return c if c is not None else self._base.grid.cells[i]
+
+    def _editCell(self, i):
+        c = self._cells.get(i)
+        if c is None:
+            c = copy.copy(self._base.grid.cells[i])
+            self._cells[i] = c
+        return c
+
+    @property
+    def grid(self):
+        return self._grid
+
+    @grid.setter
+    def grid(self, grid):
+        raise AttributeError('The grid of a PuzzleClone cannot be replaced')
+
+    @property
+    def metadata(self):
+        return self._metadata if self._metadata is not None else self._base.metadata
+
+    @metadata.setter
+    def metadata(self, metadata):
+        self._metadata = metadata
+
+    @property
+    def clues(self):
+        return self._clues if self._clues is not None else self._base.clues
+
+    @clues.setter
+    def clues(self, clues):
+        self._clues = clues
+
+    def editCell(self, x, y):
+        """
+        Return this clone's private copy of the cell at (x, y), e.g. to
+        change its style. The cell's value stays in the fill.
+        """
+        i = self._grid._positions[(x, y)]
+        self._editCell(i)
+        return FillCell(self, i)
+
+    def editMetadata(self):
+        """Return this clone's private copy of the metadata"""
+        if self._metadata is None:
+            self._metadata = copy.copy(self._base.metadata)
+        return self._metadata
+
+    def editClues(self):
+        """Return this clone's private copy of the clue lists"""
+        if self._clues is None:
+            self._clues = copy.deepcopy(list(self._base.clues))
+        return self._clues
+
+    @property
+    def fill(self):
+        """The filled values, in the order of the base grid's cells"""
+        return self._fill
+#END class PuzzleClone
@@ -0,0 +1,112 @@
+"""
+Streaming export of clue/answer pairs to JSON Lines or CSV.
+
+Rows are produced puzzle by puzzle and written in batches, so any iterable
+of (source, puzzle) pairs -- e.g. archive.iterPuzzles() -- can be exported
+without holding the whole archive in memory.
+
+    from pypuz.archive import iterPuzzles
+    exportClues(iterPuzzles('dump.tar.gz'), 'clues.jsonl.gz')
+"""
+import bz2
+import csv
+import gzip
+import json
+import lzma
+
+from .pypuz import clueDirection
+
+FIELDS = ('source', 'title', 'author', 'direction', 'number', 'clue', 'answer', 'length', 'cells')
+
+# file extension -> opener for compressed output
+COMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+def clueRows(puzzle, source=None):
+    """
+    Yield one dictionary per clue, with its answer read from the grid.
+    The grid is looked up once per puzzle, then each answer is a join
+    over the clue's cells. length is the number of squares, which is
+    less than the answer's length when it has rebus squares.
+    """
+    cells = puzzle.grid.cellIndex()
+    metadata = puzzle.metadata
+    title = getattr(metadata, 'title', None)
+    author = getattr(metadata, 'author', None)
+    for i, clueList in enumerate(puzzle.clues or []):
+        direction = clueDirection(clueList['title'], i)
+        for clue in clueList['clues']:
+            coords = clue.cells or []
+            letters = []
+            for x, y in coords:
+                c = cells.get((x, y))
+                letters.append((c.solution or '') if c is not None else '')
+            answer = ''.join(letters)
+            yield {
+                'source': source,
+                'title': title,
+                'author': author,
+                'direction': direction,
+                'number': clue.number,
+                'clue': clue.clue,
+                'answer': answer,
+                'length': len(coords),
+                'cells': [[x, y] for x, y in coords],
+            }
+#END clueRows()
+
+def _open(filename, compression):
+    """Open an output file for text, compressed if asked or if the extension says so"""
+    if compression is None:
+        for ext, opener in COMPRESSORS.items():
+            if str(filename).endswith(ext):
+                return opener(filename, 'wt', encoding='utf-8', newline='')
+        return open(filename, 'w', encoding='utf-8', newline='')
+    opener = COMPRESSORS.get('.' + compression.lstrip('.'), None)
+    if opener is None:
+        raise ValueError(f'Unknown compression: {compression}')
+    return opener(filename, 'wt', encoding='utf-8', newline='')
+
+def _format(filename):
+    name = str(filename)
+    for ext in COMPRESSORS:
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return 'csv' if name.endswith('.csv') else 'jsonl'
+
+def exportClues(items, filename, fmt=None, compression=None, batchSize=1000):
+    """
+    Write clue/answer rows for each (source, puzzle) pair to a file.
+    fmt is 'jsonl' or 'csv' (by default, from the file extension), and
+    compression is 'gz', 'bz2', 'xz' or None (by default, from the extension).
+    Rows are written batchSize at a time. Returns the number of rows written.
+    """
+    fmt = fmt or _format(filename)
+    if fmt not in ('jsonl', 'csv'):
+        raise ValueError(f'Unknown dataset format: {fmt}')
+    num_rows = 0
+    with _open(filename, compression) as fid:
+        if fmt == 'csv':
+            writer = csv.writer(fid)
+            writer.writerow(FIELDS)
+        batch = []
+        for source, puzzle in items:
+            for row in clueRows(puzzle, source=source):
+                if fmt == 'csv':
+                    row['cells'] = json.dumps(row['cells'])
+                    batch.append([row[f] for f in FIELDS])
+                else:
+                    batch.append(json.dumps(row, ensure_ascii=False) + '\n')
+                if len(batch) >= batchSize:
+                    num_rows += _flush(fid, batch, writer if fmt == 'csv' else None)
+        num_rows += _flush(fid, batch, writer if fmt == 'csv' else None)
+    return num_rows
+#END exportClues()
+
+def _flush(fid, batch, writer):
+    n = len(batch)
+    if writer is not None:
+        writer.writerows(batch)
+    else:
+        fid.writelines(batch)
+    batch.clear()
+    return n
@@ -0,0 +1,204 @@
+"""
+Structural differences between two revisions of a puzzle.
+
+Cells are compared row by row: each row is reduced to one hash of its
+cells' solutions, blocks and styles, and only rows whose hashes differ are
+compared cell by cell. Clues are matched by (direction, number), and clues
+left over on both sides are then matched by the cells they cover, so a
+renumbered entry shows up as one change rather than a removal and an
+addition. Everything is linear in the size of the puzzles.
+
+    d = old.diff(new)
+    for change in d.cells:
+        print(change.x, change.y, change.fields)
+"""
+from .pypuz import clueDirection
+
+# the cell attributes that are compared
+CELL_FIELDS = ('solution', 'isBlock', 'isEmpty', 'style')
+
+class CellChange:
+    """
+    A changed cell.
+    x, y (the coordinates)
+    fields (dictionary of attribute -> (old value, new value));
+    a cell that is only in one grid has None for the other side
+    """
+    def __init__(self, x, y, fields):
+        self.x = x
+        self.y = y
+        self.fields = fields
+
+    def __repr__(self):
+        return f"CellChange(({self.x}, {self.y}), {sorted(self.fields)})"
+#END class CellChange
+
+class ClueChange:
+    """
+    A changed clue.
+    kind ('changed', 'added' or 'removed')
+    direction ('across', 'down' or the clue list's title)
+    old, new (the Clue objects; None for an added or removed clue)
+    fields (the attributes that changed: 'clue', 'cells' and/or 'number')
+    """
+    def __init__(self, kind, direction, old, new, fields=()):
+        self.kind = kind
+        self.direction = direction
+        self.old = old
+        self.new = new
+        self.fields = list(fields)
+
+    def __repr__(self):
+        clue = self.new if self.new is not None else self.old
+        return f"ClueChange({self.kind} {self.direction} {clue.number}: {self.fields})"
+#END class ClueChange
+
+class PuzzleDiff:
+    """
+    The differences between two puzzles.
+    size ((old width, old height), (new width, new height)) or None if unchanged
+    cells (list of CellChange, in row-major order)
+    clues (list of ClueChange)
+    metadata (dictionary of field -> (old value, new value))
+    """
+    def __init__(self, size, cells, clues, metadata):
+        self.size = size
+        self.cells = cells
+        self.clues = clues
+        self.metadata = metadata
+
+    def __bool__(self):
+        return bool(self.size or self.cells or self.clues or self.metadata)
+
+    def __repr__(self):
+        return (f"PuzzleDiff({len(self.cells)} cells, {len(self.clues)} clues, "
+                f"{len(self.metadata)} metadata fields)")
+#END class PuzzleDiff
+
+def _cellKey(c):
+    if c is None:
+        return None
+    return (c.solution, bool(c.isBlock), bool(c.isEmpty), c.sharedStyle)
+
+def _rows(grid):
+    """The grid's cells as rows, with each row's keys and their hash"""
+    index = grid.cellIndex()
+    rows, keys, hashes = [], [], []
+    for y in range(grid.height):
+        row = [index.get((x, y)) for x in range(grid.width)]
+        key = tuple(_cellKey(c) for c in row)
+        rows.append(row)
+        keys.append(key)
+        hashes.append(hash(key))
+    return rows, keys, hashes
+
+def diffCells(grid1, grid2):
+    """Return a list of CellChanges between two grids"""
+    rows1, keys1, hashes1 = _rows(grid1)
+    rows2, keys2, hashes2 = _rows(grid2)
+    changes = []
+    for y in range(max(len(rows1), len(rows2))):
+        row1 = rows1[y] if y < len(rows1) else []
+        row2 = rows2[y] if y < len(rows2) else []
+        # the keys are only compared if the hashes match, to rule out a collision
+        if y < len(rows1) and y < len(rows2) and hashes1[y] == hashes2[y] and keys1[y] == keys2[y]:
+            continue
+        for x in range(max(len(row1), len(row2))):
+            c1 = row1[x] if x < len(row1) else None
+            c2 = row2[x] if x < len(row2) else None
+            if _cellKey(c1) == _cellKey(c2):
+                continue
+            fields = {}
+            for name in CELL_FIELDS:
+                # styles are compared (and reported) as the shared Styles
+                attr = 'sharedStyle' if name == 'style' else name
+                v1 = getattr(c1, attr) if c1 is not None else None
+                v2 = getattr(c2, attr) if c2 is not None else None
+                if name in ('isBlock', 'isEmpty'):
+                    # None and False both mean "no"
+                    if bool(v1) == bool(v2) and c1 is not None and c2 is not None:
+                        continue
+                elif v1 == v2:
+                    continue
+                fields[name] = (v1, v2)
+            changes.append(CellChange(x, y, fields))
+    return changes
+#END diffCells()
+
+def _clueMap(clues):
+    """(direction, number) -> Clue, in order"""
+    ret = {}
+    for i, clueList in enumerate(clues or []):
+        direction = clueDirection(clueList['title'], i)
+        for clue in clueList['clues']:
+            ret.setdefault((direction, clue.number), clue)
+    return ret
+
+def _span(clue):
+    return tuple(tuple(c) for c in clue.cells or ())
+
+def _clueFields(old, new):
+    fields = []
+    if old.clue != new.clue:
+        fields.append('clue')
+    if _span(old) != _span(new):
+        fields.append('cells')
+    if old.number != new.number:
+        fields.append('number')
+    return fields
+
+def diffClues(clues1, clues2):
+    """Return a list of ClueChanges between two clue lists"""
+    map1, map2 = _clueMap(clues1), _clueMap(clues2)
+    changes = []
+    removed = []
+    for key, old in map1.items():
+        new = map2.get(key)
+        if new is None:
+            removed.append((key, old))
+            continue
+        fields = _clueFields(old, new)
+        if fields:
+            changes.append(ClueChange('changed', key[0], old, new, fields))
+    added = [(key, new) for key, new in map2.items() if key not in map1]
+
+    # match what's left by direction and cells
+    bySpan = {}
+    for key, new in added:
+        span = _span(new)
+        if span:
+            bySpan.setdefault((key[0], span), []).append(new)
+    matched = set()
+    for key, old in removed:
+        candidates = bySpan.get((key[0], _span(old))) if old.cells else None
+        if candidates:
+            new = candidates.pop(0)
+            matched.add(id(new))
+            changes.append(ClueChange('changed', key[0], old, new, _clueFields(old, new)))
+        else:
+            changes.append(ClueChange('removed', key[0], old, None))
+    for key, new in added:
+        if id(new) not in matched:
+            changes.append(ClueChange('added', key[0], None, new))
+    return changes
+#END diffClues()
+
+def diffMetadata(md1, md2):
+    """Return a dictionary of field -> (old, new) for metadata that changed"""
+    d1 = vars(md1) if md1 is not None else {}
+    d2 = vars(md2) if md2 is not None else {}
+    changes = {}
+    for k in list(d1) + [k for k in d2 if k not in d1]:
+        if d1.get(k) != d2.get(k):
+            changes[k] = (d1.get(k), d2.get(k))
+    return changes
+
+def diff(puzzle1, puzzle2):
+    """Return a PuzzleDiff describing how puzzle2 differs from puzzle1"""
+    g1, g2 = puzzle1.grid, puzzle2.grid
+    size = None
+    if (g1.width, g1.height) != (g2.width, g2.height):
+        size = ((g1.width, g1.height), (g2.width, g2.height))
+    return PuzzleDiff(size, diffCells(g1, g2), diffClues(puzzle1.clues, puzzle2.clues),
+                      diffMetadata(puzzle1.metadata, puzzle2.metadata))
+#END diff()
@@ -0,0 +1,499 @@
+"""
+One-pass export of a Puzzle to several formats.
+
+ExportData walks the grid once and holds everything the writers share:
+the row-major cells, numbering, clue lists with their cells, the .puz clue
+order and normalized clue text. Each writer takes an ExportData and returns
+bytes, so exporting to several formats prepares the puzzle only once.
+
+    files = puzzle.export(['puz', 'ipuz'])          # {'puz': b'...', ...}
+    puzzle.export(['puz', 'ipuz'], 'out/puzzle1')   # out/puzzle1.puz, ...
+"""
+import io
+import json
+import itertools
+import re
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from xml.sax.saxutils import escape, quoteattr
+from lxml import etree
+
+from .file_types import puz
+from .pypuz import unidecode_fxn, __version__
+
+# runs of characters that Latin-1 can't encode
+_NON_LATIN1 = re.compile('[^\x00-\xff]+')
+
+def _transliterate(match):
+    return unidecode_fxn(match.group())
+
+@lru_cache(maxsize=4096)
+def toLatin1(s):
+    """
+    Transliterate a string so that it can be encoded as Latin-1 (for .puz).
+    Strings that are already Latin-1 are returned as they are; otherwise
+    only the characters outside Latin-1 go through unidecode.
+    """
+    if not s:
+        return s or ''
+    try:
+        s.encode('latin-1')
+        return s
+    except UnicodeEncodeError:
+        return _NON_LATIN1.sub(_transliterate, s)
+#END toLatin1()
+
+class ExportData:
+    """
+    The data shared by all writers, computed once from a Puzzle.
+    Everything beyond the grid layout is computed on first use.
+    """
+    def __init__(self, puzzle):
+        self.puzzle = puzzle
+        self.metadata = puzzle.metadata
+        grid = puzzle.grid
+        self.width, self.height = grid.width, grid.height
+
+        # Row-major cells (first cell wins, as in cellAt); None if missing
+        cells = [None] * (self.width * self.height)
+        for c in grid.cells:
+            i = c.y * self.width + c.x
+            if cells[i] is None:
+                cells[i] = c
+        self.cells = cells
+
+    def rows(self):
+        """The cells, one list per row"""
+        w = self.width
+        return [self.cells[i:i + w] for i in range(0, len(self.cells), w)]
+
+    @cached_property
+    def entries(self):
+        """
+        Across and down entries from the grid, as (across, down) dictionaries
+        of number -> {'word': ..., 'cells': ...}
+        """
+        return (self.puzzle.grid.acrossEntries(), self.puzzle.grid.downEntries())
+
+    @cached_property
+    def clueLists(self):
+        """
+        The clue lists as (title, [(number, clue text, cells)]).
+        Missing clue cells are filled in from the grid entries.
+        """
+        clueLists = []
+        for i, clueList in enumerate(self.puzzle.clues or []):
+            clues = []
+            for c in clueList['clues']:
+                cells = c.cells
+                if cells is None and i < 2:
+                    cells = self.entries[i].get(c.number, {}).get('cells')
+                clues.append((c.number, c.clue, cells or []))
+            clueLists.append((clueList['title'], clues))
+        return clueLists
+
+    @cached_property
+    def puzClues(self):
+        """
+        Clue text in .puz order: sorted by number, with across before down.
+        There *must* be an "across" and "down" list, else we throw an exception.
+        """
+        all_clues = []
+        num_dirs_found = 0
+        for title, clues in self.clueLists:
+            title = title.lower()
+            if title in ('across', 'down'):
+                num_dirs_found += 1
+                this_dir = int(title == 'down')
+                all_clues.extend((int(number), this_dir, clue) for number, clue, _ in clues)
+
+        if num_dirs_found != 2:
+            raise(BaseException('Proper clue lists not found'))
+
+        all_clues.sort(key=lambda c: c[:2])
+        return [c[2] for c in all_clues]
+
+    @cached_property
+    def normalizedPuzClues(self):
+        """.puz clues transliterated to Latin-1"""
+        return [toLatin1(clue) for clue in self.puzClues]
+#END class ExportData
+
+def puzBytes(data, utf8=False):
+    """
+    Return a .puz file as bytes.
+    Because of limitations of the .puz format, this is lossy at best.
+    In rare cases this may result in a nonsense .puz file
+    99% of the time this should work.
+
+    Text is transliterated to Latin-1, unless utf8 is set: then a version
+    2.0 (UTF-8) .puz file is written, which not all solvers can open.
+
+    Many thanks to xword-dl for the bulk of this code.
+    """
+    pz = puz.Puzzle()
+    if utf8:
+        pz.version, pz.fileversion = b'2.0', b'2.0\0'
+        pz.encoding = puz.ENCODING_UTF8
+    normalize = (lambda s: s or '') if utf8 else toLatin1
+    # Metadata
+    for a in ('author', 'title', 'copyright', 'notes'):
+        setattr(pz, a, normalize(getattr(data.metadata, a, '')))
+
+    # Dimensions
+    pz.width, pz.height = data.width, data.height
+
+    # Fill and solution, in a single pass over the grid
+    solution, fill = [], []
+    markup = bytearray(len(data.cells))
+    rebus_board = bytearray(len(data.cells))
+    # rebus solution -> rebus table index
+    rebus_keys = {}
+    for i, c in enumerate(data.cells):
+        if c is None or c.isBlock or c.isEmpty:
+            solution.append('.')
+            fill.append('.')
+            continue
+        if c.sharedStyle.get('shapebg') == 'circle':
+            markup[i] = 0x80
+        letters = c.solution or ''
+        solution.append(letters[:1] or 'X')
+        fill.append('-')
+        if len(letters) > 1:
+            key = rebus_keys.setdefault(letters, len(rebus_keys))
+            rebus_board[i] = key + 1
+    #END for c
+
+    pz.solution = ''.join(solution)
+    pz.fill = ''.join(fill)
+
+    # Clues
+    pz.clues.extend([c or '' for c in data.puzClues] if utf8 else data.normalizedPuzClues)
+
+    if any(markup):
+        pz.extensions[b'GEXT'] = bytes(markup)
+        pz._extensions_order.append(b'GEXT')
+        pz.markup()
+
+    if rebus_keys:
+        rebus_table = ''.join('{:2d}:{};'.format(k, v) for v, k in rebus_keys.items())
+        pz.extensions[b'GRBS'] = bytes(rebus_board)
+        pz.extensions[b'RTBL'] = pz.encode(rebus_table)
+        pz._extensions_order.extend([b'GRBS', b'RTBL'])
+        pz.rebus()
+
+    return pz.tobytes()
+#END puzBytes()
+
+def ipuzBytes(data):
+    """Return an iPuz file as bytes"""
+    d = {}
+    # Metadata first
+    d["origin"] = f"pypuz v{__version__}"
+    d["version"] = "http://ipuz.org/v1"
+    ipuzkind = f"http://ipuz.org/{data.metadata.kind}#1"
+    d['kind'] = [ipuzkind]
+    for a in ('author', 'title', 'copyright', 'notes'):
+        d[a] = getattr(data.metadata, a, '')
+    # dimensions
+    d['dimensions'] = {"width": data.width, "height": data.height}
+    # we explicitly define "block" and "empty"
+    BLOCK, EMPTY = '#', '_'
+    d['block'] = BLOCK; d['empty'] = EMPTY
+    # puzzle and solution
+    puzzle, solution = [], []
+    for cells in data.rows():
+        row, solrow = [], []
+        for c in cells:
+            if c is None or c.isEmpty:
+                row.append(None)
+                solrow.append(None)
+                continue
+            if c.isBlock:
+                row.append(BLOCK)
+            else:
+                num = c.number or EMPTY
+                this_cell = {"cell": num, "style": c.sharedStyle}
+                if c.value:
+                    this_cell["value"] = c.value
+                row.append(this_cell)
+            solrow.append(c.solution)
+        #END for c
+        puzzle.append(row)
+        solution.append(solrow)
+    #END for cells
+    d['puzzle'] = puzzle
+    # add a solution only if there is one
+    solset = set(itertools.chain(*solution))
+    if not solset.issubset(set([BLOCK, None])):
+        d['solution'] = solution
+
+    # Take care of clues, remembering that they are 1-indexed
+    clues = OrderedDict()
+    for title, clueList in data.clueLists:
+        clues[title] = [{"clue": clue, "number": number,
+                         "cells": [[x + 1, y + 1] for x, y in cells]}
+                        for number, clue, cells in clueList]
+    d['clues'] = clues
+
+    return json.dumps(d).encode('utf-8')
+#END ipuzBytes()
+
+# JPZ namespaces
+JPZ_NS = 'http://crossword.info/xml/crossword-compiler'
+JPZ_PUZZLE_NS = 'http://crossword.info/xml/rectangular-puzzle'
+JPZ_KINDS = ('crossword', 'coded', 'acrostic')
+
+def _jpzRange(a, b):
+    """Format a 1-indexed coordinate range as used in JPZ words"""
+    return str(a + 1) if a == b else f'{a + 1}-{b + 1}'
+
+def _jpzWord(word_id, cells):
+    """Return a JPZ <word> element for a list of [x, y] cells"""
+    word = etree.Element('word', id=str(word_id))
+    if cells:
+        xs, ys = [c[0] for c in cells], [c[1] for c in cells]
+        n = len(cells)
+        # a straight run of cells can be given as a range
+        if len(set(ys)) == 1 and abs(xs[-1] - xs[0]) == n - 1 and len(set(xs)) == n:
+            word.set('x', _jpzRange(xs[0], xs[-1]))
+            word.set('y', str(ys[0] + 1))
+            return word
+        if len(set(xs)) == 1 and abs(ys[-1] - ys[0]) == n - 1 and len(set(ys)) == n:
+            word.set('x', str(xs[0] + 1))
+            word.set('y', _jpzRange(ys[0], ys[-1]))
+            return word
+    for x, y in cells:
+        etree.SubElement(word, 'cells', x=str(x + 1), y=str(y + 1))
+    return word
+#END _jpzWord()
+
+def _jpzClue(word_id, number, text):
+    """Return a JPZ <clue> element, keeping any inline markup in the clue"""
+    clue = None
+    if text and '<' in text:
+        try:
+            clue = etree.fromstring(f'<clue>{text}</clue>')
+        except etree.XMLSyntaxError:
+            clue = None
+    if clue is None:
+        clue = etree.Element('clue')
+        clue.text = text or ''
+    clue.set('word', str(word_id))
+    if number is not None:
+        clue.set('number', str(number))
+    return clue
+#END _jpzClue()
+
+def _jpzCellAttributes(c):
+    """Return the attributes of a JPZ <cell> for a Cell"""
+    attrib = {'x': str(c.x + 1), 'y': str(c.y + 1)}
+    if c.isBlock:
+        attrib['type'] = 'block'
+        return attrib
+    if c.isEmpty:
+        attrib['type'] = 'void'
+        return attrib
+    if c.solution:
+        attrib['solution'] = c.solution
+    if c.number:
+        attrib['number'] = str(c.number)
+    if c.value:
+        attrib['solve-state'] = c.value
+    style = c.sharedStyle
+    if style.get('shapebg') == 'circle':
+        attrib['background-shape'] = 'circle'
+    if style.get('color'):
+        attrib['background-color'] = '#' + style['color'].lstrip('#')
+    for letter, side in (('T', 'top'), ('B', 'bottom'), ('L', 'left'), ('R', 'right')):
+        if letter in style.get('barred', ''):
+            attrib[f'{side}-bar'] = 'true'
+    mark = style.get('mark')
+    if isinstance(mark, dict) and mark.get('TR'):
+        attrib['top-right-number'] = str(mark['TR'])
+    return attrib
+#END _jpzCellAttributes()
+
+def writeJPZ(data, fid):
+    """
+    Stream a JPZ (Crossword Compiler XML) file to a binary file object.
+    Cells, words and clues are written one element at a time.
+    Elements inside <rectangular-puzzle> inherit its default namespace
+    in the output, so we build them without one (otherwise lxml would
+    redeclare the namespace on every element).
+    """
+    kind = getattr(data.metadata, 'kind', None)
+    kind = kind if kind in JPZ_KINDS else 'crossword'
+    with etree.xmlfile(fid, encoding='UTF-8') as xf:
+        xf.write_declaration()
+        with xf.element(f'{{{JPZ_NS}}}crossword-compiler', nsmap={None: JPZ_NS}):
+            with xf.element(f'{{{JPZ_PUZZLE_NS}}}rectangular-puzzle', nsmap={None: JPZ_PUZZLE_NS},
+                            alphabet='ABCDEFGHIJKLMNOPQRSTUVWXYZ'):
+                metadata = etree.Element('metadata')
+                for tag, a in (('title', 'title'), ('creator', 'author'),
+                               ('copyright', 'copyright'), ('description', 'notes')):
+                    etree.SubElement(metadata, tag).text = getattr(data.metadata, a, None) or ''
+                xf.write(metadata)
+                with xf.element(kind):
+                    with xf.element('grid', width=str(data.width), height=str(data.height)):
+                        xf.write(etree.Element('grid-look', {'numbering-scheme': 'normal'}))
+                        for c in data.cells:
+                            if c is not None:
+                                xf.write(etree.Element('cell', _jpzCellAttributes(c)))
+                    # every clue gets its own word
+                    word_id = 1
+                    for _, clues in data.clueLists:
+                        for _, _, cells in clues:
+                            xf.write(_jpzWord(word_id, cells))
+                            word_id += 1
+                    word_id = 1
+                    for title, clues in data.clueLists:
+                        with xf.element('clues', ordering='normal'):
+                            title_el = etree.Element('title')
+                            etree.SubElement(title_el, 'b').text = title
+                            xf.write(title_el)
+                            for number, clue, _ in clues:
+                                xf.write(_jpzClue(word_id, number, clue))
+                                word_id += 1
+#END writeJPZ()
+
+def writeZippedJPZ(data, fid, name='puzzle.xml'):
+    """Stream a zipped JPZ file to a binary file object"""
+    with zipfile.ZipFile(fid, 'w', zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(name, 'w') as member:
+            writeJPZ(data, member)
+#END writeZippedJPZ()
+
+def jpzBytes(data, zipped=False):
+    """Return a JPZ file as bytes"""
+    fid = io.BytesIO()
+    if zipped:
+        writeZippedJPZ(data, fid)
+    else:
+        writeJPZ(data, fid)
+    return fid.getvalue()
+#END jpzBytes()
+
+# Characters we use to stand in for rebus squares in a CFP grid
+CFP_REBUS_INPUTS = '123456789@$%&*!+=?~^0'
+
+def _cfpRebusInputs(data):
+    """Return a dictionary of rebus solution -> grid character"""
+    letters, rebuses = set(), []
+    for c in data.cells:
+        if c is not None and c.solution:
+            if len(c.solution) > 1:
+                if c.solution not in rebuses:
+                    rebuses.append(c.solution)
+            else:
+                letters.add(c.solution)
+    inputs = [ch for ch in CFP_REBUS_INPUTS if ch not in letters]
+    if len(rebuses) > len(inputs):
+        raise ValueError('Too many distinct rebus squares for a CFP file')
+    return dict(zip(rebuses, inputs))
+#END _cfpRebusInputs()
+
+def writeCFP(data, fid):
+    """
+    Stream a CrossFire (.cfp) file to a text file object, in one pass:
+    the circles and rebuses are collected while the grid is written.
+    """
+    rebus_inputs = _cfpRebusInputs(data)
+    fid.write('<?xml version="1.0" encoding="utf-8" standalone="no"?>\n')
+    fid.write('<CROSSFIRE>\n<VERSION>1</VERSION>\n')
+    for tag, a in (('TITLE', 'title'), ('AUTHOR', 'author'), ('COPYRIGHT', 'copyright')):
+        fid.write(f'<{tag}>{escape(getattr(data.metadata, a, None) or "")}</{tag}>\n')
+
+    fid.write(f'<GRID width="{data.width}">\n')
+    circles = []
+    for i, c in enumerate(data.cells):
+        if c is None or c.isBlock or c.isEmpty:
+            fid.write('.')
+        else:
+            if c.sharedStyle.get('shapebg') == 'circle':
+                circles.append(str(i))
+            letters = c.solution or '-'
+            fid.write(rebus_inputs.get(letters, letters))
+        if i % data.width == data.width - 1:
+            fid.write('\n')
+    fid.write('</GRID>\n')
+    if circles:
+        fid.write(f'<CIRCLES>{",".join(circles)}</CIRCLES>\n')
+    if rebus_inputs:
+        fid.write('<REBUSES>\n')
+        for letters, ch in rebus_inputs.items():
+            fid.write(f'<REBUS display={quoteattr(ch)} input={quoteattr(ch)} letters={quoteattr(letters)}/>\n')
+        fid.write('</REBUSES>\n')
+
+    fid.write('<WORDS>\n')
+    word_id = 0
+    for title, clues in data.clueLists:
+        direction = title.upper()
+        if direction not in ('ACROSS', 'DOWN'):
+            continue
+        for number, clue, _ in clues:
+            fid.write(f'<WORD dir="{direction}" id="{word_id}" isTheme="false" '
+                      f'num={quoteattr(str(number))}>{escape(clue or "")}</WORD>\n')
+            word_id += 1
+    fid.write('</WORDS>\n')
+    fid.write(f'<NOTES>{escape(getattr(data.metadata, "notes", None) or "")}</NOTES>\n')
+    fid.write('</CROSSFIRE>\n')
+#END writeCFP()
+
+def cfpBytes(data):
+    """Return a CrossFire file as bytes"""
+    fid = io.StringIO()
+    writeCFP(data, fid)
+    return fid.getvalue().encode('utf-8')
+#END cfpBytes()
+
+# format -> writer
+WRITERS = {'puz': puzBytes, 'ipuz': ipuzBytes, 'jpz': jpzBytes, 'cfp': cfpBytes}
+
+def _writeFile(filename, contents):
+    with open(filename, 'wb') as fid:
+        fid.write(contents)
+
+def export(puzzle, formats, basename=None, data=None, maxWorkers=None):
+    """
+    Export a puzzle to each of the given formats, preparing it only once.
+    Returns a dictionary of format -> bytes. If basename is given, the files
+    are also written (in parallel) to basename + '.' + format.
+    A previously computed ExportData may be passed in as data.
+    """
+    for fmt in formats:
+        if fmt not in WRITERS:
+            raise ValueError(f'Unknown output format: {fmt}')
+    if data is None:
+        data = ExportData(puzzle)
+    outputs = {fmt: WRITERS[fmt](data) for fmt in formats}
+    if basename is not None:
+        with ThreadPoolExecutor(max_workers=maxWorkers or len(outputs) or 1) as pool:
+            futures = [pool.submit(_writeFile, f'{basename}.{fmt}', contents)
+                       for fmt, contents in outputs.items()]
+            for f in futures:
+                f.result()
+    return outputs
+#END export()
+
+def exportMany(puzzles, formats, basenames, maxWorkers=None):
+    """
+    Export many puzzles to the given formats, writing each one to
+    basename + '.' + format. Every puzzle is prepared once for all formats,
+    and the puzzles are exported in parallel.
+    """
+    def _exportOne(puzzle, basename):
+        data = ExportData(puzzle)
+        for fmt in formats:
+            _writeFile(f'{basename}.{fmt}', WRITERS[fmt](data))
+
+    for fmt in formats:
+        if fmt not in WRITERS:
+            raise ValueError(f'Unknown output format: {fmt}')
+    with ThreadPoolExecutor(max_workers=maxWorkers) as pool:
+        futures = [pool.submit(_exportOne, p, b) for p, b in zip(puzzles, basenames)]
+        for f in futures:
+            f.result()
+#END exportMany()
@@ -1,16 +1,38 @@
 import json
 import base64
 
+def _decode(s):
+    """Parse an amuselabs payload, which might be base64'd or not"""
+    if isinstance(s, dict):
+        return s
+    try:
+        return json.loads(s)
+    except json.JSONDecodeError:
+        return json.loads(base64.b64decode(s))
+
+def _word_cells(word):
+    """
+    The cells of a placed word: its boxesForWord if it has them, otherwise
+    from its starting square, direction and length.
+    Returns None if the word doesn't say how long it is.
+    """
+    if word.get('boxesForWord'):
+        return [[b['x'], b['y']] for b in word['boxesForWord']]
+    length = word.get('nBoxes')
+    if length is None:
+        if not word.get('word'):
+            return None
+        length = len(word['word'])
+    x, y = word['x'], word['y']
+    if word['acrossNotDown']:
+        return [[x + k, y] for k in range(length)]
+    return [[x, y + k] for k in range(length)]
+
 def read_amuselabs_data(s):
     """
     Read in an amuselabs string, return a dictionary of data
     """
-    # Data might be base64'd or not
-    try:
-        data = json.loads(s)
-    except json.JSONDecodeError:
-        s1 = base64.b64decode(s)
-        data = json.loads(s1)
+    data = _decode(s)
 
     ret = {}
 
@@ -25,51 +47,71 @@ def read_amuselabs_data(s):
     , 'author': data.get('author')
     , 'title': data.get('title')
     , 'copyright': data.get('copyright')
-    , 'noClueCells': True
     # no notepad?
     }
 
     # grid
     grid = []
-    box = data['box']
-    cellInfos = data.get('cellInfos', [])
+    # box is column-major; transpose it so we can go row by row
+    rows = zip(*data['box'])
     # Reshape cellInfos to make lookup easier
     markup = {}
-    for c in cellInfos:
+    for c in data.get('cellInfos', []):
         markup[(c['x'], c['y'])] = c
-    for y in range(height):
-        for x in range(width):
-            cell = {'x': x, 'y': y, 'value': None}
-            if box[x][y] == '\x00':
+    # clue numbers go in the starting square of each word
+    placed_words = data['placedWords']
+    numbers = {(word['x'], word['y']): str(word['clueNum']) for word in placed_words}
+    for y, row in enumerate(rows):
+        for x, box_letter in enumerate(row):
+            cell = {'x': x, 'y': y, 'value': None, 'number': numbers.get((x, y))}
+            if box_letter == '\x00':
                 cell['isBlock'] = True
             else:
-                cell['solution'] = box[x][y]
+                cell['solution'] = box_letter
             style = {}
-            if markup.get((x, y)):
-                thisMarkup = markup[(x, y)]
+            thisMarkup = markup.get((x, y))
+            if thisMarkup:
                 if thisMarkup.get('isCircled'):
                     style['shapebg'] = 'circle'
                 if thisMarkup.get('isVoid'):
                     cell['isBlock'] = False
-                    cell['isVoid'] = True
+                    cell['isEmpty'] = True
                 bar_string = ''
                 for letter, side in {'B': 'bottom', 'R': 'right'}.items():
                     if thisMarkup.get(f'{side}Wall'):
                         bar_string += letter
                 if bar_string:
                     style['barred'] = bar_string
-                cell['style'] = style
+            cell['style'] = style
             grid.append(cell)
     ret['grid'] = grid
 
     # clues
-    placed_words = data['placedWords']
     across_words = [word for word in placed_words if word['acrossNotDown']]
     down_words = [word for word in placed_words if not word['acrossNotDown']]
     # sorting is probably unnecessary
     across_words = sorted(across_words, key=lambda x: (x['y'], x['x']))
     down_words = sorted(down_words, key=lambda x: (x['y'], x['x']))
-    across_clues = [{'number': str(x['clueNum']), 'clue': x['clue']['clue']} for x in across_words]
-    down_clues = [{'number': str(x['clueNum']), 'clue': x['clue']['clue']} for x in down_words]
-    ret['clues'] = [{'title': 'Across', 'clues': across_clues}, {'title': 'Down', 'clues': down_clues}]
+    clues = []
+    for title, words in (('Across', across_words), ('Down', down_words)):
+        this_clues = []
+        for word in words:
+            clue = {'number': str(word['clueNum']), 'clue': word['clue']['clue']}
+            cells = _word_cells(word)
+            if cells is None:
+                # we'll have to infer them from the grid
+                ret['metadata']['noClueCells'] = True
+            else:
+                clue['cells'] = cells
+            this_clues.append(clue)
+        clues.append({'title': title, 'clues': this_clues})
+    ret['clues'] = clues
     return ret
+
+def read_amuselabs_many(payloads):
+    """
+    Read many amuselabs strings (e.g. from a scrape), yielding a
+    dictionary of data for each one in turn
+    """
+    for s in payloads:
+        yield read_amuselabs_data(s)
@@ -39,9 +39,14 @@ def read_cfpfile(f):
     """
     Read in a CFP file, return a dictionary of data
     """
+    with open(f, 'rb') as fid:
+        return read_cfp_data(fid.read())
+
+def read_cfp_data(xml):
+    """
+    Read in CFP data (XML as a string or bytes), return a dictionary of data
+    """
     ret = dict()
-    with open(f, 'r') as fid:
-        xml = fid.read()
     tree = ET.XML(xml)
     cfpdata = etree_to_ordereddict(tree)
     cfpdata = cfpdata['CROSSFIRE']
@@ -68,7 +73,10 @@ def read_cfpfile(f):
     # Read in rebus info, if available
     rebus1 = cfpdata.get('REBUSES', {})
     rebus = dict()
-    for _, v in rebus1.items():
+    rebus_list = rebus1.get('REBUS', []) if rebus1 else []
+    if not isinstance(rebus_list, list):
+        rebus_list = [rebus_list]
+    for v in rebus_list:
         rebus[v['@input']] = v['@letters']
 
     # Circle info, if available
@@ -44,11 +44,19 @@ def read_ipuzfile(f):
     """
     Read in an ipuz file, return a dictionary of data
     """
+    with open(f, 'rb') as fid:
+        return read_ipuz_data(fid.read())
+
+def read_ipuz_data(s):
+    """
+    Read in ipuz data (a string or bytes), return a dictionary of data
+    """
     ret = dict()
     # Note that we need to load an OrderedDict
     # as the order of the keys is important
-    with open(f, encoding='utf-8') as fid:
-        ipuzdata = json.load(fid, object_pairs_hook=OrderedDict)
+    if isinstance(s, bytes):
+        s = s.decode('utf-8-sig')
+    ipuzdata = json.loads(s, object_pairs_hook=OrderedDict)
 
     # Collect metadata
     # Remove some stuff from the puzzleKind
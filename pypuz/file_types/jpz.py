@@ -1,3 +1,4 @@
+import io
 import json
 import re
 from collections import OrderedDict, defaultdict
@@ -63,16 +64,22 @@ def read_jpzfile(f):
     """
     Read in a JPZ file, return a dictionary of data
     """
+    with open(f, 'rb') as fid:
+        return read_jpz_data(fid.read())
+
+def read_jpz_data(data):
+    """
+    Read in JPZ data (zipped or plain XML bytes), return a dictionary of data
+    """
     ret = dict()
     # Try to open as a zip file
     try:
-        with zipfile.ZipFile(f, 'r') as myzip:
+        with zipfile.ZipFile(io.BytesIO(data), 'r') as myzip:
             this_file = myzip.namelist()[0]
             with myzip.open(this_file) as fid:
                 xml = fid.read()
     except zipfile.BadZipFile:
-        with open(f, 'rb') as fid:
-            xml = fid.read()
+        xml = data
     tree = ET.XML(cleanup_namespaces(xml))
     jpzdata = etree_to_ordereddict(tree)
     # Take the root node (whatever it is)
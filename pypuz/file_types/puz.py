@@ -307,17 +307,29 @@ class Puzzle:
         return self.rebus().has_rebus()
 
     def rebus(self):
-        return self.helpers.setdefault('rebus', Rebus(self))
+        rebus = self.helpers.get('rebus')
+        if rebus is None:
+            rebus = self.helpers['rebus'] = Rebus(self)
+        return rebus
 
     def has_markup(self):
         return self.markup().has_markup()
 
     def markup(self):
-        return self.helpers.setdefault('markup', Markup(self))
+        markup = self.helpers.get('markup')
+        if markup is None:
+            markup = self.helpers['markup'] = Markup(self)
+        return markup
 
     def clue_numbering(self):
-        numbering = DefaultClueNumbering(self.fill, self.clues, self.width, self.height)
-        return self.helpers.setdefault('clues', numbering)
+        # cached until the fill, clues or size change
+        key = (self.fill, tuple(self.clues), self.width, self.height)
+        numbering = self.helpers.get('clues')
+        if numbering is None or self._clue_numbering_key != key:
+            numbering = DefaultClueNumbering(self.fill, self.clues, self.width, self.height)
+            self.helpers['clues'] = numbering
+            self._clue_numbering_key = key
+        return numbering
 
     def blacksquare(self):
         return BLACKSQUARE2 if self.puzzletype == PuzzleType.Diagramless else BLACKSQUARE
@@ -487,136 +499,242 @@ class PuzzleBuffer:
 # clue numbering helper
 
 class DefaultClueNumbering:
+    """
+    Standard clue numbering for a grid, computed in one pass from the
+    lengths of the runs of white squares, which are themselves computed
+    in one backward pass over the grid.
+
+    across, down: lists of {'num', 'clue', 'clue_index', 'cell', 'len'}
+    cell_across, cell_down: for each square, the index into across/down
+    of the entry it belongs to, or -1
+    """
     def __init__(self, grid, clues, width, height):
         self.grid = grid
         self.clues = clues
         self.width = width
         self.height = height
 
+        size = width * height
+        white = [not is_blacksquare(ch) for ch in grid[:size]]
+        # run_across[i] / run_down[i]: how many white squares from i
+        # rightwards / downwards, up to the next black square or edge
+        run_across = [0] * size
+        run_down = [0] * size
+        for i in range(size - 1, -1, -1):
+            if white[i]:
+                run_across[i] = 1 + (run_across[i + 1] if (i + 1) % width else 0)
+                run_down[i] = 1 + (run_down[i + width] if i + width < size else 0)
+        self.run_across = run_across
+        self.run_down = run_down
+
         # compute across & down
         a = []
         d = []
+        cell_across = [-1] * size
+        cell_down = [-1] * size
         c = 0
         n = 1
-        for i in range(0, len(grid)):
-            if not is_blacksquare(grid[i]):
-                lastc = c
-                is_across = self.col(i) == 0 or is_blacksquare(grid[i - 1])
-                if is_across and self.len_across(i) > 1:
+        for i in range(size):
+            if not white[i]:
+                continue
+            lastc = c
+            col = i % width
+            if col == 0 or not white[i - 1]:
+                length = run_across[i]
+                if length > 1:
                     a.append({
                         'num': n,
                         'clue': clues[c],
                         'clue_index': c,
                         'cell': i,
-                        'len': self.len_across(i)
+                        'len': length
                     })
                     c += 1
-                is_down = self.row(i) == 0 or is_blacksquare(grid[i - width])
-                if is_down and self.len_down(i) > 1:
+                    cell_across[i:i + length] = [len(a) - 1] * length
+            if i < width or not white[i - width]:
+                length = run_down[i]
+                if length > 1:
                     d.append({
                         'num': n,
                         'clue': clues[c],
                         'clue_index': c,
                         'cell': i,
-                        'len': self.len_down(i)
+                        'len': length
                     })
                     c += 1
-                if c > lastc:
-                    n += 1
+                    cell_down[i:i + length * width:width] = [len(d) - 1] * length
+            if c > lastc:
+                n += 1
 
         self.across = a
         self.down = d
+        self.cell_across = cell_across
+        self.cell_down = cell_down
 
     def col(self, index):
         return index % self.width
 
     def row(self, index):
-        return int(math.floor(index / self.width))
+        return index // self.width
 
     def len_across(self, index):
-        for c in range(0, self.width - self.col(index)):
-            if is_blacksquare(self.grid[index + c]):
-                return c
-        return c + 1
+        return self.run_across[index]
 
     def len_down(self, index):
-        for c in range(0, self.height - self.row(index)):
-            if is_blacksquare(self.grid[index + c*self.width]):
-                return c
-        return c + 1
+        return self.run_down[index]
 
 
 class Rebus:
+    """
+    The rebus extensions (GRBS, RTBL and RUSR) of a puzzle.
+    Until table is used, the GRBS grid is read straight from the extension
+    bytes; the table, solutions and fill are only parsed when first used,
+    and save() writes back the ones that were.
+    """
     def __init__(self, puzzle):
         self.puzzle = puzzle
-        # parse rebus data
-        rebus_data = self.puzzle.extensions.get(Extensions.Rebus, b'')
-        self.table = parse_bytes(rebus_data)
-        r_sol_data = self.puzzle.extensions.get(Extensions.RebusSolutions, b'')
-        solutions_str = r_sol_data.decode(puzzle.encoding)
-        fill_data = self.puzzle.extensions.get(Extensions.RebusFill, b'')
-        fill_str = fill_data.decode(puzzle.encoding)
-        self.solutions = dict(
-            (int(item[0]), item[1])
-            for item in parse_dict(solutions_str).items()
-        )
-        self.fill = dict(
+        self._table = None
+        self._squares = None
+        self._solutions = None
+        self._fill = None
+
+    @property
+    def table(self):
+        # one entry per square: 0, or 1 + the key into the solutions table
+        if self._table is None:
+            self._table = parse_bytes(self.puzzle.extensions.get(Extensions.Rebus, b''))
+        return self._table
+
+    @table.setter
+    def table(self, table):
+        self._table = table
+
+    def _grid(self):
+        """The table if it has been parsed, otherwise the extension bytes"""
+        if self._table is not None:
+            return self._table
+        return self.puzzle.extensions.get(Extensions.Rebus, b'')
+
+    @property
+    def solutions(self):
+        if self._solutions is None:
+            self._solutions = self._parse(Extensions.RebusSolutions)
+        return self._solutions
+
+    @solutions.setter
+    def solutions(self, solutions):
+        self._solutions = solutions
+
+    @property
+    def fill(self):
+        if self._fill is None:
+            self._fill = self._parse(Extensions.RebusFill)
+        return self._fill
+
+    @fill.setter
+    def fill(self, fill):
+        self._fill = fill
+
+    def _parse(self, code):
+        data = self.puzzle.extensions.get(code, b'')
+        return dict(
             (int(item[0]), item[1])
-            for item in parse_dict(fill_str).items()
+            for item in parse_dict(data.decode(self.puzzle.encoding)).items()
         )
 
     def has_rebus(self):
         return Extensions.Rebus in self.puzzle.extensions
 
     def is_rebus_square(self, index):
-        return bool(self.table[index])
+        grid = self._grid()
+        return index < len(grid) and bool(grid[index])
 
     def get_rebus_squares(self):
-        return [i for i, b in enumerate(self.table) if b]
+        grid = self._grid()
+        if self._table is not None:
+            return [i for i, b in enumerate(grid) if b]
+        # cached for as long as the extension data isn't replaced
+        if self._squares is None or self._squares[0] is not grid:
+            self._squares = (grid, [i for i, b in enumerate(grid) if b])
+        return self._squares[1]
 
     def get_rebus_solution(self, index):
         if self.is_rebus_square(index):
-            return self.solutions[self.table[index] - 1]
+            return self.solutions[self._grid()[index] - 1]
         return None
 
     def get_rebus_fill(self, index):
         if self.is_rebus_square(index):
-            return self.fill[self.table[index] - 1]
+            return self.fill[self._grid()[index] - 1]
         return None
 
     def set_rebus_fill(self, index, value):
         if self.is_rebus_square(index):
-            self.fill[self.table[index] - 1] = value
+            self.fill[self._grid()[index] - 1] = value
 
     def save(self):
         if self.has_rebus():
-            # commit changes back to puzzle.extensions
-            self.puzzle.extensions[Extensions.Rebus] = pack_bytes(self.table)
-            rebus_solutions = self.puzzle.encode(dict_to_string(self.solutions))
-            self.puzzle.extensions[Extensions.RebusSolutions] = rebus_solutions
-            rebus_fill = self.puzzle.encode(dict_to_string(self.fill))
-            self.puzzle.extensions[Extensions.RebusFill] = rebus_fill
+            # commit changes back to puzzle.extensions; parts that were
+            # never parsed can't have changed, so their bytes are kept
+            if self._table is not None:
+                self.puzzle.extensions[Extensions.Rebus] = pack_bytes(self._table)
+            if self._solutions is not None:
+                rebus_solutions = self.puzzle.encode(dict_to_string(self._solutions))
+                self.puzzle.extensions[Extensions.RebusSolutions] = rebus_solutions
+            if self._fill is not None:
+                rebus_fill = self.puzzle.encode(dict_to_string(self._fill))
+                self.puzzle.extensions[Extensions.RebusFill] = rebus_fill
 
 
 class Markup:
+    """
+    The markup extension (GEXT) of a puzzle.
+    Until markup is used, it is read straight from the extension bytes;
+    save() writes the list back once it has been built.
+    """
     def __init__(self, puzzle):
         self.puzzle = puzzle
-        # parse markup data
-        markup_data = self.puzzle.extensions.get(Extensions.Markup, b'')
-        self.markup = parse_bytes(markup_data)
+        self._markup = None
+        self._squares = None
+
+    @property
+    def markup(self):
+        if self._markup is None:
+            self._markup = parse_bytes(self.puzzle.extensions.get(Extensions.Markup, b''))
+        return self._markup
+
+    @markup.setter
+    def markup(self, markup):
+        self._markup = markup
+
+    def _grid(self):
+        """The markup list if it has been built, otherwise the extension bytes"""
+        if self._markup is not None:
+            return self._markup
+        return self.puzzle.extensions.get(Extensions.Markup, b'')
 
     def has_markup(self):
-        return any(bool(b) for b in self.markup)
+        grid = self._grid()
+        if self._markup is not None:
+            return any(bool(b) for b in grid)
+        return bool(grid.strip(b'\0'))
 
     def get_markup_squares(self):
-        return [i for i, b in enumerate(self.markup) if b]
+        grid = self._grid()
+        if self._markup is not None:
+            return [i for i, b in enumerate(grid) if b]
+        # cached for as long as the extension data isn't replaced
+        if self._squares is None or self._squares[0] is not grid:
+            self._squares = (grid, [i for i, b in enumerate(grid) if b])
+        return self._squares[1]
 
     def is_markup_square(self, index):
-        return bool(self.markup[index])
+        grid = self._grid()
+        return index < len(grid) and bool(grid[index])
 
     def save(self):
-        if self.has_markup():
-            self.puzzle.extensions[Extensions.Markup] = pack_bytes(self.markup)
+        if self._markup is not None and self.has_markup():
+            self.puzzle.extensions[Extensions.Markup] = pack_bytes(self._markup)
 
 
 # helper functions for cksums and scrambling
@@ -741,10 +859,13 @@ def restore(s, t):
     return ''.join(next(t) if not is_blacksquare(c) else c for c in s)
 
 
+BLACKSQUARES = frozenset((BLACKSQUARE, BLACKSQUARE2))
+
+
 def is_blacksquare(c):
     if isinstance(c, int):
         c = chr(c)
-    return c in [BLACKSQUARE, BLACKSQUARE2]
+    return c in BLACKSQUARES
 
 
 #
@@ -753,11 +874,11 @@ def is_blacksquare(c):
 
 
 def parse_bytes(s):
-    return list(struct.unpack('B' * len(s), s))
+    return list(s)
 
 
 def pack_bytes(a):
-    return struct.pack('B' * len(a), *a)
+    return bytes(a)
 
 
 # dict string format is k1:v1;k2:v2;...;kn:vn;
@@ -0,0 +1,56 @@
+"""
+Duplicate detection across a corpus, using Grid fingerprints.
+
+Each puzzle is hashed once, so deduplicating N puzzles is a single linear
+pass with a dictionary of the hashes seen so far, rather than comparing
+every pair of grids.
+
+    for source, puzzle in dedupe(items, invariant=True):
+        ...  # only the first copy of each puzzle
+"""
+
+# kinds of fingerprint
+SOLUTION = 'solution'
+INVARIANT = 'invariant'
+PATTERN = 'pattern'
+
+def puzzleFingerprint(puzzle, kind=SOLUTION):
+    """
+    Fingerprint a puzzle's grid.
+    kind is SOLUTION (exact solution and blocks), INVARIANT (the same under
+    rotation and transposition) or PATTERN (block pattern only, also invariant)
+    """
+    grid = puzzle.grid
+    if kind == SOLUTION:
+        return grid.fingerprint()
+    elif kind == INVARIANT:
+        return grid.fingerprint(invariant=True)
+    elif kind == PATTERN:
+        return grid.patternFingerprint(invariant=True)
+    raise ValueError(f'Unknown fingerprint kind: {kind}')
+#END puzzleFingerprint()
+
+def dedupe(items, kind=INVARIANT):
+    """
+    Given an iterable of (source, puzzle) pairs, yield only the first
+    pair for each distinct fingerprint. Memory grows with the number of
+    distinct puzzles, not with the size of each one.
+    """
+    seen = set()
+    for source, puzzle in items:
+        h = puzzleFingerprint(puzzle, kind)
+        if h not in seen:
+            seen.add(h)
+            yield source, puzzle
+#END dedupe()
+
+def findDuplicates(items, kind=INVARIANT):
+    """
+    Given an iterable of (source, puzzle) pairs, return a list of groups
+    of sources that share a fingerprint (only groups with more than one source)
+    """
+    groups = {}
+    for source, puzzle in items:
+        groups.setdefault(puzzleFingerprint(puzzle, kind), []).append(source)
+    return [sources for sources in groups.values() if len(sources) > 1]
+#END findDuplicates()
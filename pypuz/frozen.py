@@ -0,0 +1,209 @@
+"""
+Read-only puzzles that can be shared between threads.
+
+Reading entries from an ordinary Puzzle writes to it: acrossEntries() and
+downEntries() renumber the cells, and the cell and clue indexes are built
+on first use. Puzzle.freeze() does all of that once, up front, and returns
+a FrozenPuzzle whose cells, clues and metadata cannot be changed and whose
+accessors only ever read, so one instance can be used from many threads
+without locks.
+
+    shared = Puzzle().load('x.ipuz').freeze()
+    shared.grid.acrossEntries()  # a fresh dictionary, computed at freeze time
+
+copy.copy() and copy.deepcopy() of a frozen cell, clue or clue list give
+ordinary, editable objects; so does clone() of a FrozenPuzzle.
+"""
+import copy
+
+from .pypuz import Cell, Clue, ClueIndex, Grid, MetaData, Puzzle
+
+def _readOnly(obj, name, value=None):
+    raise AttributeError(f'{type(obj).__name__} is read-only (cannot set {name})')
+
+def _copyCell(c):
+    """An ordinary Cell with the same attributes as any cell-like object"""
+    cell = Cell(c.x, c.y, value=c.value, number=c.number, isBlock=c.isBlock, isEmpty=c.isEmpty, style=c.sharedStyle)
+    # Cell() uppercases the solution; keep it exactly as it was
+    cell.solution = c.solution
+    return cell
+
+class FrozenCell(Cell):
+    """
+    A read-only Cell. copy.copy() returns an ordinary, mutable Cell.
+    """
+    __slots__ = ('x', 'y', 'solution', 'value', 'number', 'isBlock', 'isEmpty', '_style')
+
+    def __init__(self, cell):
+        for name in ('x', 'y', 'solution', 'value', 'number', 'isBlock', 'isEmpty'):
+            object.__setattr__(self, name, getattr(cell, name))
+        object.__setattr__(self, '_style', cell.sharedStyle)
+
+    __setattr__ = _readOnly
+
+    @property
+    def style(self):
+        # the shared Style itself, which can't be changed
+        return self._style
+
+    def setStyle(self, **changes):
+        _readOnly(self, 'style')
+
+    def __copy__(self):
+        return _copyCell(self)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def __reduce__(self):
+        return (FrozenCell, (self.__copy__(),))
+#END class FrozenCell
+
+class FrozenClue(Clue):
+    """A read-only Clue; its cells are a tuple of (x, y) tuples"""
+    __slots__ = ('clue', 'cells', 'number')
+
+    def __init__(self, clue):
+        object.__setattr__(self, 'clue', clue.clue)
+        object.__setattr__(self, 'cells', tuple(tuple(c) for c in clue.cells) if clue.cells is not None else None)
+        object.__setattr__(self, 'number', clue.number)
+
+    __setattr__ = _readOnly
+
+    def __copy__(self):
+        cells = [list(c) for c in self.cells] if self.cells is not None else None
+        return Clue(self.clue, cells, number=self.number)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def __reduce__(self):
+        return (FrozenClue, (self.__copy__(),))
+#END class FrozenClue
+
+class FrozenClueList(dict):
+    """A read-only {'title': ..., 'clues': (FrozenClue, ...)} clue list"""
+    def __init__(self, clueList):
+        dict.__init__(self, clueList)
+        dict.__setitem__(self, 'clues', tuple(FrozenClue(c) for c in clueList['clues']))
+
+    def _readOnly(self, *args, **kwargs):
+        raise TypeError('FrozenClueList is read-only')
+    __setitem__ = __delitem__ = __ior__ = _readOnly
+    clear = pop = popitem = setdefault = update = _readOnly
+
+    def __copy__(self):
+        return dict(self, clues=list(self['clues']))
+
+    def __deepcopy__(self, memo):
+        return {k: (copy.deepcopy(v, memo) if k != 'clues' else [c.__copy__() for c in v])
+                for k, v in self.items()}
+
+    def __reduce__(self):
+        return (FrozenClueList, (self.__copy__(),))
+#END class FrozenClueList
+
+class FrozenMetaData(MetaData):
+    """Read-only MetaData"""
+    def __init__(self, metadata):
+        for k, v in vars(metadata).items():
+            object.__setattr__(self, k, v)
+
+    __setattr__ = _readOnly
+
+    def __copy__(self):
+        md = MetaData(self.kind)
+        md.__dict__.update(vars(self))
+        return md
+
+    def __reduce__(self):
+        return (FrozenMetaData, (self.__copy__(),))
+#END class FrozenMetaData
+
+def _freezeEntries(entries):
+    return {number: (e['word'], tuple(tuple(c) for c in e['cells'])) for number, e in entries.items()}
+
+def _thawEntries(entries):
+    return {number: {'word': word, 'cells': [list(c) for c in cells]} for number, (word, cells) in entries.items()}
+
+class FrozenGrid(Grid):
+    """
+    A read-only Grid, with its numbering, entries and cell index computed
+    when it is made
+    """
+    def __init__(self, grid):
+        # number a private copy, so the original grid isn't touched
+        cells = [_copyCell(c) for c in grid.cells]
+        work = Grid(cells)
+        across, down = work.acrossEntries(), work.downEntries()
+        frozen = tuple(FrozenCell(c) for c in cells)
+        index = {}
+        for c in frozen:
+            index.setdefault((c.x, c.y), c)
+        object.__setattr__(self, '_cells', frozen)
+        object.__setattr__(self, 'width', work.width)
+        object.__setattr__(self, 'height', work.height)
+        object.__setattr__(self, '_cellIndex', index)
+        # for clones of a frozen puzzle (see clone._positions)
+        object.__setattr__(self, '_clonePositions', {(c.x, c.y): i for i, c in reversed(list(enumerate(frozen)))})
+        object.__setattr__(self, '_across', _freezeEntries(across))
+        object.__setattr__(self, '_down', _freezeEntries(down))
+
+    __setattr__ = _readOnly
+
+    def cellIndex(self):
+        return self._cellIndex
+
+    def invalidate(self):
+        pass
+
+    def setNumbering(self):
+        # the cells were numbered when the grid was frozen
+        pass
+
+    def acrossEntries(self):
+        return _thawEntries(self._across)
+
+    def downEntries(self):
+        return _thawEntries(self._down)
+
+    def __reduce__(self):
+        return (FrozenGrid, (Grid([copy.copy(c) for c in self.cells]),))
+#END class FrozenGrid
+
+class FrozenPuzzle(Puzzle):
+    """
+    A read-only Puzzle: see Puzzle.freeze().
+    The clues are a tuple of FrozenClueLists, each holding a tuple of
+    FrozenClues. Use clone() for an editable copy that shares this
+    puzzle's data, or thaw() for an independent one.
+    """
+    def __init__(self, puzzle):
+        grid = FrozenGrid(puzzle.grid)
+        clues = tuple(FrozenClueList(cl) for cl in puzzle.clues or [])
+        metadata = FrozenMetaData(puzzle.metadata) if puzzle.metadata is not None else None
+        object.__setattr__(self, 'metadata', metadata)
+        object.__setattr__(self, 'grid', grid)
+        object.__setattr__(self, 'clues', clues)
+        object.__setattr__(self, '_clueIndex', ClueIndex(clues))
+
+    __setattr__ = _readOnly
+
+    def clueIndex(self):
+        return self._clueIndex
+
+    def invalidateIndexes(self):
+        pass
+
+    def freeze(self):
+        return self
+
+    def thaw(self):
+        """Return an ordinary, mutable Puzzle with a copy of this puzzle's data"""
+        clues = [copy.deepcopy(cl) for cl in self.clues]
+        metadata = copy.copy(self.metadata) if self.metadata is not None else None
+        return Puzzle(metadata=metadata, grid=Grid([copy.copy(c) for c in self.grid.cells]), clues=clues)
+
+    def __reduce__(self):
+        return (FrozenPuzzle, (self.thaw(),))
+#END class FrozenPuzzle
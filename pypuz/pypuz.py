@@ -1,7 +1,9 @@
 from .file_types import puz, ipuz, cfp, jpz, amuselabs
+from . import check, score, stats
+import hashlib
 import json
-import itertools
-from collections import OrderedDict
+import os
+import weakref
 
 # Get the current version
 from importlib.metadata import version, PackageNotFoundError
@@ -21,6 +23,19 @@ from unidecode import unidecode as unidecode_fxn
 
 CROSSWORD_TYPE = 'crossword'
 
+# Formats we can read, and the file extensions that map to them
+READ_FORMATS = ('puz', 'ipuz', 'jpz', 'cfp', 'amuselabs')
+EXTENSIONS = {'.puz': 'puz', '.ipuz': 'ipuz', '.jpz': 'jpz', '.xml': 'jpz', '.cfp': 'cfp'}
+# Formats we can write, and the Puzzle method that writes them
+WRITE_FORMATS = {'puz': 'toPuz', 'ipuz': 'toIPuz', 'jpz': 'toJPZ', 'cfp': 'toCFP'}
+
+def formatFromFilename(filename):
+    """Guess a file's format from its extension"""
+    ext = os.path.splitext(str(filename))[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f'Unknown file extension: {filename}')
+    return EXTENSIONS[ext]
+
 # Class for crossword metadata
 # This is a mostly uninteresting class
 class MetaData:
@@ -35,6 +50,163 @@ class MetaData:
         self.kind = kind
 #END class MetaData
 
+# Cell styles
+def _styleKey(v):
+    """A hashable key for a style value: dicts and lists become tuples"""
+    if isinstance(v, dict):
+        return ('{}',) + tuple((k, _styleKey(x)) for k, x in v.items())
+    if isinstance(v, (list, tuple)):
+        return ('[]',) + tuple(_styleKey(x) for x in v)
+    return v
+
+def _freezeStyleValue(v):
+    """An immutable copy of a style value: dicts become Styles, lists tuples"""
+    if isinstance(v, dict):
+        return Style.of(v)
+    if isinstance(v, (list, tuple)):
+        return tuple(_freezeStyleValue(x) for x in v)
+    return v
+
+class Style(dict):
+    """
+    A read-only cell style (a dictionary -- see Cell).
+    Styles are interned: Style.of() returns one shared object for each
+    distinct style, so cells with the same style share it. Values inside a
+    Style are read-only too (dictionaries are Styles, lists are tuples).
+    Cell.style gives a private copy whose changes are written back to the
+    cell (re-interned); changing a Style itself in place raises TypeError.
+    """
+    __slots__ = ('_key', '_nested', '__weakref__')
+    # key -> Style, for every Style in use
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def of(cls, style):
+        """Return the interned Style equal to a dictionary (an empty one for None)"""
+        if isinstance(style, Style):
+            return style
+        if not style:
+            return EMPTY_STYLE
+        key = _styleKey(style)
+        s = cls._interned.get(key)
+        if s is None:
+            # frozen copies, so later changes to the caller's values can't leak in
+            s = cls._interned[key] = cls(key, {k: _freezeStyleValue(v) for k, v in style.items()})
+        return s
+
+    def __init__(self, key=(), style=()):
+        # use Style.of() rather than making Styles directly
+        dict.__init__(self, style)
+        self._key = key
+        self._nested = any(isinstance(v, tuple) for v in self.values())
+
+    def __hash__(self):
+        # equal styles with their keys in a different order hash the same
+        return hash(frozenset(self._key[1:])) if self._key else 0
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # nothing in a Style can change, so it can be shared
+        return self
+
+    def __reduce__(self):
+        return (Style.of, (dict(self),))
+
+    def _readOnly(self, *args, **kwargs):
+        raise TypeError('Styles are shared and read-only: change a cell\'s style through cell.style')
+    __setitem__ = __delitem__ = __ior__ = _readOnly
+    clear = pop = popitem = setdefault = update = _readOnly
+#END class Style
+
+EMPTY_STYLE = Style()
+
+class _StyleChanges:
+    """
+    Mixin for the mutable containers of a CellStyle: every change calls
+    _changed() on the CellStyle they belong to
+    """
+    __slots__ = ()
+
+    def _changed(self):
+        self._root._changed()
+
+    def __reduce__(self):
+        return (self._plain, (self._plain(self),))
+
+def _notifying(base, names):
+    """Methods for the given names that call base's method, then _changed()"""
+    def notify(fxn):
+        def method(self, *args, **kwargs):
+            result = fxn(self, *args, **kwargs)
+            self._changed()
+            return result
+        method.__name__ = fxn.__name__
+        return method
+    return {name: notify(getattr(base, name)) for name in names}
+
+_DICT_CHANGES = ('__setitem__', '__delitem__', '__ior__', 'clear', 'pop', 'popitem', 'setdefault', 'update')
+_LIST_CHANGES = ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert',
+                 'pop', 'remove', 'clear', 'sort', 'reverse')
+
+class _StyleDict(_StyleChanges, dict):
+    """A dictionary inside a CellStyle"""
+    __slots__ = ('_root',)
+    _plain = dict
+
+    def __init__(self, root, items):
+        dict.__init__(self, items)
+        self._root = root
+
+class _StyleList(_StyleChanges, list):
+    """A list inside a CellStyle"""
+    __slots__ = ('_root',)
+    _plain = list
+
+    def __init__(self, root, items):
+        list.__init__(self, items)
+        self._root = root
+
+def _thawStyleValue(v, root):
+    """A mutable copy of a Style value, whose changes are reported to root"""
+    if isinstance(v, dict):
+        return _StyleDict(root, {k: _thawStyleValue(x, root) for k, x in v.items()})
+    if isinstance(v, tuple):
+        return _StyleList(root, [_thawStyleValue(x, root) for x in v])
+    return v
+
+class CellStyle(_StyleChanges, dict):
+    """
+    The style of one cell, as returned by Cell.style: a private copy of
+    the cell's shared Style. Changing it -- or a list or dictionary inside
+    it -- stores the changed style on the cell (interned again), so other
+    cells with the same style are not affected.
+    """
+    __slots__ = ('_owner', '_source')
+    _plain = dict
+
+    def __init__(self, style, owner):
+        if style._nested:
+            dict.__init__(self, {k: _thawStyleValue(v, self) for k, v in style.items()})
+        else:
+            # nothing inside can change, so a shallow copy will do
+            dict.__init__(self, style)
+        self._owner = owner
+        # the Style this is a copy of
+        self._source = style
+
+    def _changed(self):
+        self._source = Style.of(self)
+        self._owner.style = self._source
+#END class CellStyle
+
+for _cls, _base, _names in ((_StyleDict, dict, _DICT_CHANGES), (_StyleList, list, _LIST_CHANGES),
+                            (CellStyle, dict, _DICT_CHANGES)):
+    for _name, _method in _notifying(_base, _names).items():
+        setattr(_cls, _name, _method)
+del _cls, _base, _names, _name, _method
+
 # Class for a crossword cell
 class Cell:
     """
@@ -47,8 +219,12 @@ class Cell:
     isBlock (boolean -- set to True if the cell is a black square)
     isEmpty (boolean -- set to True if the cell is a "void")
     style (dictionary -- see the "StyleSpec" section on http://www.ipuz.org/)
+    Styles are stored as shared, read-only Style objects (sharedStyle);
+    cell.style is a copy of the cell's style (made on first use and kept
+    until the style changes), and changes to it are stored back on this
+    cell only.
     """
-    def __init__(self, x, y, solution=None, value=None, number=None, isBlock=None, isEmpty=None, style={}):
+    def __init__(self, x, y, solution=None, value=None, number=None, isBlock=None, isEmpty=None, style=None):
         self.x = x
         self.y = y
         if solution:
@@ -62,11 +238,124 @@ class Cell:
             self.number = None
         self.isBlock = isBlock
         self.isEmpty = isEmpty
+        self._styleView = None
+        self.style = style
+
+    @property
+    def style(self):
+        view = self._styleView
+        if view is None or view._source is not self._style:
+            view = self._styleView = CellStyle(self._style, self)
+        return view
+
+    @style.setter
+    def style(self, style):
+        self._style = Style.of(style)
+
+    @property
+    def sharedStyle(self):
+        """The cell's interned, read-only Style (cheaper to read than style)"""
+        return self._style
+
+    def __getstate__(self):
+        # copies and pickles don't take this cell's style view with them
+        state = dict(self.__dict__)
+        state.pop('_styleView', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._styleView = None
+
+    def setStyle(self, **changes):
+        """
+        Change some style properties, e.g. cell.setStyle(shapebg='circle').
+        A value of None removes the property.
+        """
+        style = dict(self._style)
+        for k, v in changes.items():
+            if v is None:
+                style.pop(k, None)
+            else:
+                style[k] = v
         self.style = style
 
     def __repr__(self):
         return f"Cell({{({self.x}, {self.y}), {self.solution}}})"
 
+def _hashRows(rows):
+    """Hash a 2D array of cell strings"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f'{len(rows[0]) if rows else 0}x{len(rows)}'.encode('utf-8'))
+    for row in rows:
+        # unit and record separators keep rebus squares unambiguous
+        h.update(('\x1e' + '\x1f'.join(row)).encode('utf-8'))
+    return h.hexdigest()
+
+class VersionedList(list):
+    """
+    A list that counts the changes made to it, so that an index built from
+    it knows when to rebuild: used for a Grid's cells and for the clues in
+    each of a Puzzle's clue lists
+    """
+    __slots__ = ('version',)
+
+    def __init__(self, cells=()):
+        list.__init__(self, cells)
+        self.version = 0
+
+    def __setitem__(self, i, c):
+        self.version += 1
+        list.__setitem__(self, i, c)
+
+    def __delitem__(self, i):
+        self.version += 1
+        list.__delitem__(self, i)
+
+    def __iadd__(self, cells):
+        self.version += 1
+        return list.__iadd__(self, cells)
+
+    def __imul__(self, n):
+        self.version += 1
+        return list.__imul__(self, n)
+
+    def append(self, c):
+        self.version += 1
+        list.append(self, c)
+
+    def extend(self, cells):
+        self.version += 1
+        list.extend(self, cells)
+
+    def insert(self, i, c):
+        self.version += 1
+        list.insert(self, i, c)
+
+    def pop(self, i=-1):
+        self.version += 1
+        return list.pop(self, i)
+
+    def remove(self, c):
+        self.version += 1
+        list.remove(self, c)
+
+    def clear(self):
+        self.version += 1
+        list.clear(self)
+
+    def sort(self, *, key=None, reverse=False):
+        self.version += 1
+        list.sort(self, key=key, reverse=reverse)
+
+    def reverse(self):
+        self.version += 1
+        list.reverse(self)
+
+    def __reduce__(self):
+        return (VersionedList, (list(self),))
+#END class VersionedList
+
 class Grid:
     """
     Class for a crossword grid
@@ -77,6 +366,17 @@ class Grid:
         self.height = max(c.y for c in cells) + 1
         self.width = max(c.x for c in cells) + 1
 
+    @property
+    def cells(self):
+        return self._cells
+
+    @cells.setter
+    def cells(self, cells):
+        # a list is kept as a VersionedList, so that changes to it can be seen
+        if isinstance(cells, list) and not isinstance(cells, VersionedList):
+            cells = VersionedList(cells)
+        self._cells = cells
+
     def __repr__(self):
         return json.dumps(self.solutionArray())
 
@@ -97,9 +397,64 @@ class Grid:
 
     # return the cell at (x,y)
     def cellAt(self, x, y):
-        for c in self.cells:
-            if c.x == x and c.y == y:
-                return c
+        return self.cellIndex().get((x, y))
+
+    def cellIndex(self):
+        """
+        Return a dictionary of (x, y) -> Cell.
+        This is built on first use and rebuilt when cells are added,
+        removed or replaced; call invalidate() after changing the x or y
+        of a cell in place.
+        """
+        cells = self.cells
+        key = (cells, getattr(cells, 'version', 0))
+        index = getattr(self, '_cellIndex', None)
+        if index is None or self._cellIndexKey[0] is not cells or self._cellIndexKey[1] != key[1]:
+            index = {}
+            for c in cells:
+                # the first cell at a position wins
+                index.setdefault((c.x, c.y), c)
+            self._cellIndex = index
+            self._cellIndexKey = key
+        return index
+
+    def invalidate(self):
+        """Drop the cached cell index"""
+        self._cellIndex = None
+
+    def stats(self):
+        """
+        Return a dictionary of grid statistics (word and block counts,
+        word lengths, symmetry, unchecked squares, ...) computed in
+        a single pass; see stats.gridStats
+        """
+        return stats.gridStats(self)
+
+    def fingerprint(self, invariant=False, patternOnly=False):
+        """
+        Return a stable hash (hex string) of the solution and block pattern.
+        With invariant=True, the hash is the same for all rotations and
+        reflections (including transposition) of the grid.
+        With patternOnly=True, only the block pattern is hashed.
+        """
+        if patternOnly:
+            rows = [['#' if c in ('#', '_') else '.' for c in row] for row in self.solutionArray()]
+        else:
+            rows = [[(c or '').upper() for c in row] for row in self.solutionArray()]
+        if not invariant:
+            return _hashRows(rows)
+        # the eight symmetries of a rectangle: four rotations, with and without transposing
+        hashes = []
+        for arr in (rows, [list(r) for r in zip(*rows)]):
+            for _ in range(4):
+                hashes.append(_hashRows(arr))
+                arr = [list(r) for r in zip(*arr[::-1])]
+        return min(hashes)
+    #END fingerprint()
+
+    def patternFingerprint(self, invariant=False):
+        """Return a stable hash of the block pattern only"""
+        return self.fingerprint(invariant=invariant, patternOnly=True)
 
     # Return the solution at (x, y)
     def letterAt(self, x, y):
@@ -124,9 +479,9 @@ class Grid:
             return True
         elif self.isBlack(x + md['xoffset'], y + md['yoffset']):
             return True
-        elif dir in self.cellAt(x, y).style.get('barred', ''):
+        elif dir in self.cellAt(x, y).sharedStyle.get('barred', ''):
             return True
-        elif dir2 in self.cellAt(x + md['xoffset'], y + md['yoffset']).style.get('barred', ''):
+        elif dir2 in self.cellAt(x + md['xoffset'], y + md['yoffset']).sharedStyle.get('barred', ''):
             return True
         return False
     #END hasBlack
@@ -216,6 +571,76 @@ class Clue:
         return self.clue
 #END Clue
 
+# clue list titles that we know the direction of
+DIRECTIONS = ('across', 'down')
+
+def clueDirection(title, i):
+    """
+    The direction of the i-th clue list: 'across' or 'down' if the title
+    says so (or, failing that, for the first two lists); else the title
+    """
+    direction = (title or '').strip().lower()
+    if direction in DIRECTIONS:
+        return direction
+    if i < len(DIRECTIONS):
+        return DIRECTIONS[i]
+    return direction
+
+class ClueIndex:
+    """
+    Lookup tables for a puzzle's clues, built in one pass over the clue cells:
+    * byNumber -- (direction, number) -> Clue
+    * byCell -- (x, y) -> [across Clue, down Clue, position in the across
+      clue, position in the down clue] (None where there is no clue)
+    Directions are 'across', 'down' or the lowercased clue list title.
+    """
+    def __init__(self, clues):
+        self.byNumber = {}
+        self.byCell = {}
+        for i, clueList in enumerate(clues or []):
+            direction = clueDirection(clueList['title'], i)
+            for clue in clueList['clues']:
+                self.byNumber.setdefault((direction, clue.number), clue)
+                if direction not in DIRECTIONS:
+                    continue
+                k = DIRECTIONS.index(direction)
+                for pos, (x, y) in enumerate(clue.cells or []):
+                    entry = self.byCell.get((x, y))
+                    if entry is None:
+                        entry = self.byCell[(x, y)] = [None, None, None, None]
+                    if entry[k] is None:
+                        entry[k], entry[k + 2] = clue, pos
+    #END __init__()
+
+    def cluesAt(self, x, y):
+        """Return the (across, down) clues containing the cell at (x, y)"""
+        entry = self.byCell.get((x, y))
+        if entry is None:
+            return None, None
+        return entry[0], entry[1]
+
+    def clue(self, direction, number):
+        """Return the clue with the given direction and number, or None"""
+        return self.byNumber.get((direction.lower(), str(number)))
+
+    def position(self, x, y, direction):
+        """Return the offset of (x, y) within its clue in the given direction, or None"""
+        entry = self.byCell.get((x, y))
+        if entry is None:
+            return None
+        return entry[DIRECTIONS.index(direction.lower()) + 2]
+#END class ClueIndex
+
+def _versionClueLists(clues):
+    """
+    Keep the clues of each clue list as a VersionedList, so that changes
+    to them can be seen without comparing every clue
+    """
+    for clueList in clues or []:
+        inner = clueList.get('clues')
+        if isinstance(inner, list) and not isinstance(inner, VersionedList):
+            clueList['clues'] = VersionedList(inner)
+
 class Puzzle:
     """
     Class for a crossword
@@ -228,11 +653,118 @@ class Puzzle:
         # clues is just a list of dictionaries, e.g.
         # [ {'title': 'Across', 'clues': [...], 'title': 'Down', 'clues': [...]} ]
         self.clues = clues
+        _versionClueLists(clues)
+
+    def clueIndex(self):
+        """
+        Return the ClueIndex for this puzzle.
+        It is built on first use and rebuilt when the grid, a clue list or
+        a clue is replaced, added or removed; call invalidateIndexes()
+        after changing a clue's cells or number in place.
+        """
+        clues = self.clues
+        index = getattr(self, '_clueIndex', None)
+        if index is None or not self._clueIndexIsCurrent(clues):
+            _versionClueLists(clues)
+            lists = [(cl, cl['clues'], getattr(cl['clues'], 'version', 0)) for cl in clues or []]
+            index = ClueIndex(clues)
+            self._clueIndex, self._clueIndexKey = index, (self.grid, clues, lists)
+        return index
+    #END clueIndex()
+
+    def _clueIndexIsCurrent(self, clues):
+        """Whether nothing the clue index was built from has changed"""
+        grid, oldClues, lists = self._clueIndexKey
+        if grid is not self.grid or oldClues is not clues or len(lists) != len(clues or ()):
+            return False
+        for (clueList, inner, version), current in zip(lists, clues):
+            if current is not clueList or clueList['clues'] is not inner or getattr(inner, 'version', 0) != version:
+                return False
+        return True
+
+    def invalidateIndexes(self):
+        """Drop the cached clue and cell indexes"""
+        self._clueIndex = None
+        if self.grid is not None:
+            self.grid.invalidate()
+
+    def cluesAt(self, x, y):
+        """Return the (across, down) clues containing the cell at (x, y)"""
+        return self.clueIndex().cluesAt(x, y)
+
+    def clueFor(self, direction, number):
+        """Return the clue with the given direction ('across' or 'down') and number"""
+        return self.clueIndex().clue(direction, number)
+
+    def cluePosition(self, x, y, direction):
+        """Return the offset of the cell at (x, y) within its across or down clue"""
+        return self.clueIndex().position(x, y, direction)
+
+    def clone(self):
+        """
+        Return a copy-on-write clone.PuzzleClone of this puzzle.
+        The clone has its own fill but shares everything else with this
+        puzzle, which should not be modified while clones are in use.
+        """
+        from .clone import PuzzleClone
+        return PuzzleClone(self)
+
+    def freeze(self):
+        """
+        Return a read-only frozen.FrozenPuzzle copy of this puzzle, with its
+        numbering, entries and indexes computed up front, which can be
+        shared between threads without locking.
+        """
+        from .frozen import FrozenPuzzle
+        return FrozenPuzzle(self)
+
+    def checker(self, rebusFirstLetter=False):
+        """
+        Return a check.Checker for this puzzle.
+        Use this to re-check only the cells that changed.
+        """
+        return check.Checker(self, rebusFirstLetter=rebusFirstLetter)
+
+    def check(self, rebusFirstLetter=False):
+        """
+        Check the filled values against the solution.
+        Returns a check.CheckResult with the incorrect cells and
+        the incorrect and complete entries.
+        """
+        return self.checker(rebusFirstLetter=rebusFirstLetter).result()
+
+    def scorer(self):
+        """
+        Return a score.BulkScorer for scoring many submitted fills
+        against this puzzle's solution at once.
+        """
+        return score.BulkScorer(self)
+
+    def diff(self, other):
+        """
+        Compare this puzzle with another revision of it.
+        Returns a diff.PuzzleDiff of the changed cells, clues and metadata.
+        """
+        from .diff import diff
+        return diff(self, other)
+
+    def validate(self, failFast=False):
+        """
+        Check the puzzle's structure: cells against the grid size,
+        and clue cells against the grid.
+        Returns a list of validate.ValidationIssues (empty if all is well).
+        """
+        from .validate import validatePuzzle
+        return validatePuzzle(self, failFast=failFast)
 
     def fromPuz(self, puzFile):
         # Read in the file
         pz = puz.read(puzFile)
+        return self.fromPuzObject(pz)
+    #END fromPuz()
 
+    def fromPuzObject(self, pz):
+        """Create a Puzzle instance from a puz.Puzzle"""
         # Set up the metadata
         kind = CROSSWORD_TYPE
         if pz.puzzletype == 1025:
@@ -247,6 +779,9 @@ class Puzzle:
 
         # Create the grid
         cells = []
+        # the rebus and markup helpers work straight from the extension bytes
+        r = pz.rebus() if pz.has_rebus() else None
+        m = pz.markup() if pz.has_markup() else None
         i = 0
         for y in range(metadata.height):
             for x in range(metadata.width):
@@ -258,16 +793,12 @@ class Puzzle:
                 if cell_value in ('.', ':'):
                     cell_value, isBlock = None, True
                 # Rebus
-                if pz.has_rebus():
-                    r = pz.rebus()
-                    if i in r.get_rebus_squares():
-                        cell_value = r.get_rebus_solution(i)
+                if r is not None and r.is_rebus_square(i):
+                    cell_value = r.get_rebus_solution(i)
                 # Circles
                 style = {}
-                if pz.has_markup():
-                    m = pz.markup()
-                    if i in m.get_markup_squares():
-                        style = {"shapebg": "circle"}
+                if m is not None and m.is_markup_square(i):
+                    style = {"shapebg": "circle"}
                 cell = Cell(x, y, solution=cell_value, value=fill, isBlock=isBlock, style=style)
                 cells.append(cell)
                 i += 1
@@ -293,163 +824,128 @@ class Puzzle:
                 clues[i]['clues'].append(clue)
 
         return Puzzle(metadata=metadata, grid=grid, clues=clues)
-    #END fromPuz()
+    #END fromPuzObject()
 
-    def toPuz(self, filename):
+    def toPuz(self, filename=None, utf8=False):
         """
         Write a .puz file.
+        If no filename is given, return the encoded file as bytes instead.
+        Text is transliterated to Latin-1, unless utf8 is set, which writes
+        a version 2.0 (UTF-8) .puz file instead.
         Because of limitations of the .puz format, this is lossy at best.
-        In rare cases this may result in a nonsense .puz file
-        99% of the time this should work.
+        See export.puzBytes for details.
+        """
+        from . import export
+        data = export.puzBytes(export.ExportData(self), utf8=utf8)
+        if filename is None:
+            return data
 
-        Many thanks to xword-dl for the bulk of this code.
+        # Save the file
+        with open(filename, 'wb') as fid:
+            fid.write(data)
+    #END toPuz()
+
+    def toIPuz(self, filename=None):
         """
-        pz = puz.Puzzle()
-        # Metadata
-        for a in ('author', 'title', 'copyright', 'notes'):
-            setattr(pz, a, getattr(self.metadata, a, ''))
+        Write an iPuz file.
+        If no filename is given, return the encoded file as bytes instead.
+        """
+        from . import export
+        data = export.ipuzBytes(export.ExportData(self))
+        if filename is None:
+            return data
 
-        # Dimensions
-        pz.width, pz.height = self.grid.width, self.grid.height
+        # write the file
+        with open(filename, 'wb') as fid:
+            fid.write(data)
+    #END toIPuz
 
-        # Fill and solution
-        circled = [(c.x, c.y) for c in self.grid.cells if c.style.get('shapebg') == 'circle']
-        solution, fill, markup, rebus_board, rebus_index, rebus_table = '', '', b'', [], 0, ''
+    def toJPZ(self, filename=None, zipped=False):
+        """
+        Write a JPZ (Crossword Compiler XML) file, optionally zipped.
+        If no filename is given, return the encoded file as bytes instead.
+        The file is streamed out element by element.
+        """
+        from . import export
+        data = export.ExportData(self)
+        if filename is None:
+            return export.jpzBytes(data, zipped=zipped)
 
-        for row_num in range(self.grid.height):
-            for col_num in range(self.grid.width):
-                c = self.grid.cellAt(col_num, row_num)
-                if c.isBlock:
-                    solution += '.'
-                    fill += '.'
-                    markup += b'\x00'
-                    rebus_board.append(0)
-                elif len(c.solution) == 1:
-                    solution += c.solution
-                    fill += '-'
-                    markup += b'\x80' if (col_num, row_num) in circled else b'\x00'
-                    rebus_board.append(0)
-                else:
-                    solution += c.solution[0]
-                    fill += '-'
-                    rebus_board.append(rebus_index + 1)
-                    rebus_table += '{:2d}:{};'.format(rebus_index, c.solution)
-                    rebus_index += 1
-                #END if/else
-            #END for col_num
-        #END for row_num
-
-        pz.solution = solution
-        pz.fill = fill
+        with open(filename, 'wb') as fid:
+            if zipped:
+                name = os.path.splitext(os.path.basename(filename))[0] + '.xml'
+                export.writeZippedJPZ(data, fid, name=name)
+            else:
+                export.writeJPZ(data, fid)
+    #END toJPZ()
 
-        # Clues
-        # there *must* be an "across" and "down" here, else we throw an exception
-        all_clues = []
-        num_dirs_found = 0
-        for clue_list in self.clues:
-            if clue_list['title'].lower() == 'across':
-                num_dirs_found += 1
-                for c in clue_list['clues']:
-                    setattr(c, 'dir', 0)
-                    all_clues.append(c)
-            if clue_list['title'].lower() == 'down':
-                num_dirs_found += 1
-                for c in clue_list['clues']:
-                    setattr(c, 'dir', 1)
-                    all_clues.append(c)
-
-        if num_dirs_found != 2:
-            raise(BaseException('Proper clue lists not found'))
-
-        weirdass_puz_clue_sorting = sorted(all_clues, key=lambda c: (int(c.number), c.dir))
-
-        clues = [c.clue for c in weirdass_puz_clue_sorting]
-
-        normalized_clues = [unidecode_fxn(clue) for clue in clues]
-        pz.clues.extend(normalized_clues)
-
-        has_markup = b'\x80' in markup
-        has_rebus = any(rebus_board)
-
-        if has_markup:
-            pz.extensions[b'GEXT'] = markup
-            pz._extensions_order.append(b'GEXT')
-            pz.markup()
-
-        if has_rebus:
-            pz.extensions[b'GRBS'] = bytes(rebus_board)
-            pz.extensions[b'RTBL'] = rebus_table.encode(puz.ENCODING)
-            pz._extensions_order.extend([b'GRBS', b'RTBL'])
-            pz.rebus()
+    def toCFP(self, filename=None):
+        """
+        Write a CrossFire (.cfp) file.
+        If no filename is given, return the encoded file as bytes instead.
+        Multi-letter solutions are written as rebus squares.
+        """
+        from . import export
+        data = export.ExportData(self)
+        if filename is None:
+            return export.cfpBytes(data)
 
-        # Save the file
-        pz.save(filename)
+        with open(filename, 'w', encoding='utf-8') as fid:
+            export.writeCFP(data, fid)
+    #END toCFP()
 
-        return
-    #END toPuz()
+    def toSVG(self, filename=None, cellSize=32, solutions=False, numbers=True, values=False):
+        """
+        Draw the grid as an SVG image: blocks, bars, circles, background
+        colours and numbers, and optionally the solution or filled letters.
+        If no filename is given, return the image as bytes instead.
+        See svg.svgString for details.
+        """
+        from . import export, svg
+        data = svg.svgBytes(export.ExportData(self), cellSize=cellSize, solutions=solutions,
+                            numbers=numbers, values=values)
+        if filename is None:
+            return data
 
-    def toIPuz(self, filename):
-        """Write an iPuz file"""
-        d = {}
-        # Metadata first
-        d["origin"] = f"pypuz v{__version__}"
-        d["version"] = "http://ipuz.org/v1"
-        ipuzkind = f"http://ipuz.org/{self.metadata.kind}#1"
-        d['kind'] = [ipuzkind]
-        for a in ('author', 'title', 'copyright', 'notes'):
-            d[a] = getattr(self.metadata, a, '')
-        # dimensions
-        d['dimensions'] = {"width": self.grid.width, "height": self.grid.height}
-        # we explicitly define "block" and "empty"
-        BLOCK, EMPTY = '#', '_'
-        d['block'] = BLOCK; d['empty'] = EMPTY
-        # puzzle and solution
-        puzzle, solution = [], []
-        for y in range(self.grid.height):
-            row, solrow = [], []
-            for x in range(self.grid.width):
-                c = self.grid.cellAt(x, y)
-                if c.isBlock:
-                    row.append(BLOCK)
-                elif c.isEmpty:
-                    row.append(None)
-                else:
-                    num = c.number or EMPTY
-                    this_cell = {"cell": num, "style": c.style}
-                    if c.value:
-                        this_cell["value"] = c.value
-                    row.append(this_cell)
-                solrow.append(c.solution)
-            #END for x
-            puzzle.append(row)
-            solution.append(solrow)
-        #END for y
-        d['puzzle'] = puzzle
-        # add a solution only if there is one
-        solset = set(list(itertools.chain(*solution)))
-        if not solset.issubset(set([BLOCK, None])):
-            d['solution'] = solution
-
-        # Take care of clues, remembering that they are 1-indexed
-        clues = OrderedDict()
-        for c1 in self.clues:
-            c1_arr = []
-            for c2 in c1['clues']:
-                thisClue = {"clue": c2.clue, "number": c2.number}
-                thisCells = []
-                for c3 in c2.cells:
-                    thisCells.append([c3[0]+1, c3[1]+1])
-                thisClue["cells"] = thisCells
-                c1_arr.append(thisClue)
-            #END for c2
-            clues[c1['title']] = c1_arr
-        #END for c1
-        d['clues'] = clues
+        with open(filename, 'wb') as fid:
+            fid.write(data)
+    #END toSVG()
 
-        # write the file
-        with open(filename, 'w') as fid:
-            json.dump(d, fid)
-    #END toIPuz
+    def export(self, formats, basename=None):
+        """
+        Export this puzzle to several formats at once, e.g. ['puz', 'ipuz'].
+        The grid, numbering, entries and clue order are computed only once.
+        Returns a dictionary of format -> bytes; if basename is given, the
+        files are also written to basename + '.' + format.
+        """
+        from . import export
+        return export.export(self, formats, basename=basename)
+    #END export()
+
+    def toData(self, fmt):
+        """
+        Return this puzzle encoded in the given format (see WRITE_FORMATS) as bytes
+        """
+        if fmt not in WRITE_FORMATS:
+            raise ValueError(f'Unknown output format: {fmt}')
+        return getattr(self, WRITE_FORMATS[fmt])()
+    #END toData()
+
+    def save(self, filename, fmt=None):
+        """Write a file, in the format given by its extension unless fmt is set"""
+        data = self.toData(fmt or formatFromFilename(filename))
+        with open(filename, 'wb') as fid:
+            fid.write(data)
+    #END save()
+
+    async def asave(self, filename, fmt=None, executor=None):
+        """
+        Asynchronous save(): the file is encoded on the given executor
+        (or aio's default) and written without blocking the event loop.
+        """
+        from . import aio
+        await aio.asave(self, filename, fmt=fmt, executor=executor)
+    #END asave()
 
     def fromDict(self, d1):
         """
@@ -471,7 +967,7 @@ class Puzzle:
         for c in d1['grid']:
             cell = Cell(c['x'], c['y'], solution=c.get('solution', '')
                 , value=c.get('value'), number=c.get('number')
-                , isBlock=c.get('isBlock'), isEmpty=c.get('isEmpty'), style=c.get('style', {}))
+                , isBlock=c.get('isBlock'), isEmpty=c.get('isEmpty'), style=c.get('style'))
             cells.append(cell)
         #END for c
         grid = Grid(cells)
@@ -499,6 +995,44 @@ class Puzzle:
         return Puzzle(metadata=metadata, grid=grid, clues=clues)
     #END fromIPuz()
 
+    def fromData(self, data, fmt):
+        """
+        Create a Puzzle instance from the contents of a file (bytes)
+        in the given format: one of READ_FORMATS
+        """
+        if fmt == 'puz':
+            return self.fromPuzObject(puz.load(data))
+        elif fmt == 'ipuz':
+            return Puzzle().fromDict(ipuz.read_ipuz_data(data))
+        elif fmt == 'jpz':
+            return Puzzle().fromDict(jpz.read_jpz_data(data))
+        elif fmt == 'cfp':
+            return Puzzle().fromDict(cfp.read_cfp_data(data))
+        elif fmt == 'amuselabs':
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+            return Puzzle().fromDict(amuselabs.read_amuselabs_data(data))
+        raise ValueError(f'Unknown input format: {fmt}')
+    #END fromData()
+
+    def load(self, filename, fmt=None):
+        """Read a file, in the format given by its extension unless fmt is set"""
+        with open(filename, 'rb') as fid:
+            data = fid.read()
+        return self.fromData(data, fmt or formatFromFilename(filename))
+    #END load()
+
+    @staticmethod
+    async def aload(filename, fmt=None, executor=None):
+        """
+        Asynchronous load(), e.g. `puzzle = await Puzzle.aload('x.jpz')`.
+        The file is read without blocking the event loop and parsed on the
+        given executor (or aio's default).
+        """
+        from . import aio
+        return await aio.aload(filename, fmt=fmt, executor=executor)
+    #END aload()
+
     def fromIPuz(self, puzFile):
         ipz = ipuz.read_ipuzfile(puzFile)
         return Puzzle().fromDict(ipz)
@@ -0,0 +1,175 @@
+"""
+Bulk scoring of many submitted grids against one solution.
+
+Submissions are packed grids: one character per square in row-major order,
+the same layout as the fill of a .puz file. Blocks may be anything (they
+are not scored), and unfilled squares are usually '-' or ' '. Since a
+packed grid has one character per square, a rebus square is scored against
+the first letter of its solution.
+
+If numpy is installed, a whole batch is scored in a handful of array
+operations; otherwise we fall back to plain Python, one submission at a time.
+"""
+from .file_types import puz
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+class ScoreResult:
+    """
+    Scores for a batch of N submissions.
+    errors (N error counts -- squares that don't match, including blanks)
+    blanks (N counts of unfilled squares)
+    wrongMask (N x height x width booleans, True where a square is wrong)
+    entryCorrect (N x number of entries booleans, in the order of BulkScorer.entries)
+    With numpy these are numpy arrays, otherwise nested lists.
+    """
+    def __init__(self, errors, blanks, wrongMask, entryCorrect):
+        self.errors = errors
+        self.blanks = blanks
+        self.wrongMask = wrongMask
+        self.entryCorrect = entryCorrect
+
+    def __repr__(self):
+        return f"ScoreResult(errors={list(self.errors)})"
+#END class ScoreResult
+
+def _pack(fills, size):
+    """Pack a list of str/bytes grids into one uppercase bytes object"""
+    packed = []
+    for f in fills:
+        if isinstance(f, str):
+            f = f.encode(puz.ENCODING, 'replace')
+        if len(f) != size:
+            raise ValueError(f'Expected a packed grid of length {size}, got {len(f)}')
+        packed.append(f)
+    return b''.join(packed).upper()
+#END _pack()
+
+def _asArray(fills, size):
+    """Return an (N, size) uint8 array of uppercase character codes"""
+    if isinstance(fills, np.ndarray):
+        arr = fills.reshape(len(fills), -1).astype(np.uint8, copy=False)
+        if arr.shape[1] != size:
+            raise ValueError(f'Expected packed grids of length {size}, got {arr.shape[1]}')
+        lower = (arr >= ord('a')) & (arr <= ord('z'))
+        return np.where(lower, arr - 32, arr).astype(np.uint8)
+    return np.frombuffer(_pack(fills, size), dtype=np.uint8).reshape(-1, size)
+#END _asArray()
+
+class BulkScorer:
+    """
+    Scores many submissions against the solution of a single Puzzle.
+    The solution and entry layout are computed once, up front.
+    """
+    def __init__(self, puzzle):
+        grid = puzzle.grid
+        self.width, self.height = grid.width, grid.height
+        size = self.width * self.height
+        self.size = size
+
+        solution = bytearray(b'.' * size)
+        scored = bytearray(size)
+        for c in grid.cells:
+            i = c.y * self.width + c.x
+            if not (c.isBlock or c.isEmpty) and c.solution:
+                solution[i] = ord(c.solution[0].encode(puz.ENCODING, 'replace'))
+                scored[i] = 1
+        self.solution = bytes(solution).upper()
+        self.scored = bytes(scored)
+
+        # Entries as (title, number) with their cell offsets
+        self.entries = []
+        self.entryOffsets = []
+        for clueList in puzzle.clues or []:
+            for clue in clueList['clues']:
+                offsets = [y * self.width + x for x, y in clue.cells or []
+                           if 0 <= x < self.width and 0 <= y < self.height]
+                offsets = [i for i in offsets if scored[i]]
+                if offsets:
+                    self.entries.append((clueList['title'], clue.number))
+                    self.entryOffsets.append(offsets)
+
+        if np is not None:
+            self._solutionArray = np.frombuffer(self.solution, dtype=np.uint8)
+            self._scoredArray = np.frombuffer(self.scored, dtype=np.uint8).astype(bool)
+            self._flatOffsets = np.array([i for o in self.entryOffsets for i in o], dtype=np.intp)
+            lengths = [len(o) for o in self.entryOffsets]
+            self._entryStarts = np.cumsum([0] + lengths[:-1]).astype(np.intp)
+    #END __init__()
+
+    def score(self, fills):
+        """
+        Score a batch of submissions.
+        fills is a list of packed grids (str or bytes), or with numpy,
+        an (N, width*height) or (N, height, width) array of character codes.
+        """
+        if np is None:
+            return self._scorePython(fills)
+        arr = _asArray(fills, self.size)
+        n = len(arr)
+        wrong = (arr != self._solutionArray) & self._scoredArray
+        blank = ((arr == ord('-')) | (arr == ord(' ')) | (arr == 0)) & self._scoredArray
+        if len(self._flatOffsets):
+            entryWrong = np.add.reduceat(wrong[:, self._flatOffsets], self._entryStarts, axis=1)
+            entryCorrect = entryWrong == 0
+        else:
+            entryCorrect = np.ones((n, 0), dtype=bool)
+        return ScoreResult(wrong.sum(axis=1), blank.sum(axis=1),
+                           wrong.reshape(n, self.height, self.width), entryCorrect)
+    #END score()
+
+    def _scorePython(self, fills):
+        """The same as score(), without numpy"""
+        w = self.width
+        errors, blanks, masks, entryCorrect = [], [], [], []
+        packed = _pack(fills, self.size)
+        for k in range(0, len(packed), self.size):
+            fill = packed[k:k + self.size]
+            wrong = [bool(s) and f != c for f, c, s in zip(fill, self.solution, self.scored)]
+            errors.append(sum(wrong))
+            blanks.append(sum(1 for f, s in zip(fill, self.scored) if s and f in b'- \0'))
+            masks.append([wrong[i:i + w] for i in range(0, self.size, w)])
+            entryCorrect.append([not any(wrong[i] for i in o) for o in self.entryOffsets])
+        return ScoreResult(errors, blanks, masks, entryCorrect)
+    #END _scorePython()
+#END class BulkScorer
+
+def checkLockedAnswers(pz, fills):
+    """
+    Check many fills against a locked puz.Puzzle in one pass.
+    This is the batch version of puz.Puzzle.check_answers: with numpy,
+    the scrambled checksums of all fills are computed together.
+    Returns a list (or numpy array) of booleans.
+    """
+    if not pz.is_solution_locked():
+        return [f == pz.solution for f in fills]
+    if np is None:
+        return [pz.check_answers(f) for f in fills]
+
+    size = pz.width * pz.height
+    packed = []
+    for f in fills:
+        if isinstance(f, str):
+            f = f.encode(pz.encoding, puz.ENCODING_ERRORS)
+        if len(f) != size:
+            raise ValueError(f'Expected a packed grid of length {size}, got {len(f)}')
+        packed.append(f)
+    arr = np.frombuffer(b''.join(packed), dtype=np.uint8).reshape(-1, pz.height, pz.width)
+    # The checksum runs down the columns, skipping black squares
+    arr = arr.transpose(0, 2, 1).reshape(len(packed), size)
+    black = ord(pz.blacksquare())
+    columnMajor = puz.square(pz.solution, pz.width, pz.height).encode(pz.encoding)
+    isBlack = np.frombuffer(columnMajor, dtype=np.uint8) == black
+    data = arr[:, ~isBlack].astype(np.uint32)
+
+    cksum = np.zeros(len(packed), dtype=np.uint32)
+    for k in range(data.shape[1]):
+        cksum = ((cksum >> 1) | ((cksum & 1) << 15)) + data[:, k]
+        cksum &= 0xffff
+    # a fill whose black squares are in the wrong places can't be right
+    blacksMatch = ((arr == black) == isBlack).all(axis=1)
+    return (cksum == pz.scrambled_cksum) & blacksMatch
+#END checkLockedAnswers()
@@ -0,0 +1,340 @@
+"""
+A local HTTP service for converting, inspecting and validating puzzles.
+
+Converting one file from a script costs an interpreter start and the
+imports every time. The server here keeps a pool of worker processes that
+are started (and have imported pypuz) before the first request arrives;
+requests are plain HTTP bodies, handled by a stdlib ThreadingHTTPServer
+and passed to the pool as bytes.
+
+    POST /convert?from=puz&to=ipuz   body: the file; returns the converted file
+    POST /inspect?format=jpz         returns JSON: metadata, size, clue counts, stats
+    POST /validate?format=ipuz       returns JSON: the ValidationIssues
+    GET  /stats                      returns JSON: per-endpoint counters
+
+Instead of format (or from), filename=x.puz picks the format by extension.
+
+At most workers + queueSize requests are accepted at once; beyond that a
+request gets 503 with Retry-After straight away, rather than waiting in an
+unbounded queue. Each worker keeps an LRU cache of the puzzles it has
+parsed (frozen, see Puzzle.freeze), keyed by the body's digest, so a file
+that is converted to several formats in a row is only parsed once per
+worker. The server can run on a background thread, e.g. for tests:
+
+    with PuzzleServer(('127.0.0.1', 0), workers=2) as server:
+        server.start()
+        urlopen(server.url + '/stats')
+
+or from the command line: python -m pypuz serve --port 8080
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from . import validate
+from .pypuz import Puzzle, READ_FORMATS, WRITE_FORMATS, formatFromFilename
+
+CONTENT_TYPES = {
+    'puz': 'application/x-crossword',
+    'ipuz': 'application/json',
+    'jpz': 'application/xml',
+    'cfp': 'application/xml',
+}
+ENDPOINTS = ('convert', 'inspect', 'validate')
+
+# Per-process state of the pool's workers
+_cache = None
+_cacheSize = 0
+
+def _initWorker(cacheSize):
+    global _cache, _cacheSize
+    _cache = OrderedDict()
+    _cacheSize = cacheSize
+
+def _ping():
+    return None
+
+def _parse(data, fmt):
+    """Return (frozen Puzzle, whether it came from the cache)"""
+    key = (fmt, hashlib.blake2b(data, digest_size=16).digest())
+    puzzle = _cache.get(key)
+    if puzzle is not None:
+        _cache.move_to_end(key)
+        return puzzle, True
+    puzzle = Puzzle().fromData(data, fmt).freeze()
+    if _cacheSize:
+        _cache[key] = puzzle
+        if len(_cache) > _cacheSize:
+            _cache.popitem(last=False)
+    return puzzle, False
+#END _parse()
+
+# These run on the pool; each returns (result, cache hit)
+def _convert(data, src, dst):
+    puzzle, hit = _parse(data, src)
+    return puzzle.toData(dst), hit
+
+def _inspect(data, fmt):
+    puzzle, hit = _parse(data, fmt)
+    grid = puzzle.grid
+    return {
+        'metadata': dict(vars(puzzle.metadata)) if puzzle.metadata is not None else None,
+        'width': grid.width,
+        'height': grid.height,
+        'clues': {cl['title']: len(cl['clues']) for cl in puzzle.clues},
+        'stats': grid.stats(),
+        'fingerprint': grid.fingerprint(),
+    }, hit
+
+def _validate(data, fmt, failFast):
+    issues = validate.validateData(data, fmt, failFast=failFast)
+    return [{'code': i.code, 'message': i.message, 'location': i.location, 'severity': i.severity}
+            for i in issues], False
+
+class HTTPError(Exception):
+    """An error response: status code and message"""
+    def __init__(self, status, message, headers=None):
+        Exception.__init__(self, message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+#END class HTTPError
+
+class EndpointStats:
+    """
+    Counters for one endpoint.
+    requests, errors, rejected (turned away with 503), cacheHits,
+    bytesIn, bytesOut, and the total and maximum latency of the
+    requests that were handled
+    """
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.cacheHits = 0
+        self.bytesIn = 0
+        self.bytesOut = 0
+        self.totalLatency = 0.0
+        self.maxLatency = 0.0
+
+    def toDict(self, uptime):
+        handled = self.requests - self.rejected
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'cacheHits': self.cacheHits,
+            'bytesIn': self.bytesIn,
+            'bytesOut': self.bytesOut,
+            'meanLatencyMs': round(1000 * self.totalLatency / handled, 3) if handled else None,
+            'maxLatencyMs': round(1000 * self.maxLatency, 3),
+            'requestsPerSecond': round(handled / uptime, 3) if uptime > 0 else None,
+        }
+#END class EndpointStats
+
+class PuzzleRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'pypuz'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send(self, status, body, contentType, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _sendJSON(self, status, obj, headers=None):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        return self._send(status, body, 'application/json; charset=utf-8', headers)
+
+    def _readBody(self):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise HTTPError(411, 'Content-Length is required')
+        try:
+            length = int(length)
+        except ValueError:
+            raise HTTPError(400, 'Bad Content-Length')
+        if length > self.server.maxBodySize:
+            # don't leave the body unread on a connection that stays open
+            self.close_connection = True
+            raise HTTPError(413, f'The body is larger than {self.server.maxBodySize} bytes')
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        if path == '/stats':
+            self._sendJSON(200, self.server.statsDict())
+        else:
+            self._sendJSON(404, {'error': f'Not found: {path}'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.strip('/')
+        if endpoint not in ENDPOINTS:
+            self.close_connection = True
+            length = self.headers.get('Content-Length', '')
+            if length.isdigit() and int(length) <= self.server.maxBodySize:
+                self.rfile.read(int(length))
+                self.close_connection = False
+            self._sendJSON(404, {'error': f'Not found: {url.path}'})
+            return
+        self.server.handleRequest(self, endpoint, {k: v[-1] for k, v in parse_qs(url.query).items()})
+#END class PuzzleRequestHandler
+
+def _inputFormat(query, name='format'):
+    fmt = query.get(name)
+    if not fmt and query.get('filename'):
+        try:
+            fmt = formatFromFilename(query['filename'])
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+    if fmt not in READ_FORMATS:
+        raise HTTPError(400, f'Unknown input format: {fmt}' if fmt else f'Missing {name} (or filename)')
+    return fmt
+
+class PuzzleServer(ThreadingHTTPServer):
+    """
+    The HTTP server and its worker pool.
+    address ((host, port); port 0 picks a free port)
+    workers (number of worker processes)
+    queueSize (how many requests may wait for a worker before new ones get 503)
+    cacheSize (parsed puzzles kept per worker; 0 disables the cache)
+    maxBodySize (largest accepted request body, in bytes)
+    """
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), workers=2, queueSize=16, cacheSize=64,
+                 maxBodySize=8 * 1024 * 1024, quiet=True):
+        self.workers = workers
+        self.maxBodySize = maxBodySize
+        self.quiet = quiet
+        self._slots = threading.BoundedSemaphore(workers + queueSize)
+        self._statsLock = threading.Lock()
+        self._stats = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+        self._started = time.monotonic()
+        self._thread = None
+        # start the workers (and their imports) now rather than on the first request
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(cacheSize,))
+        pings = []
+        try:
+            pings = [self.pool.submit(_ping) for _ in range(workers)]
+            for f in pings:
+                f.result()
+            ThreadingHTTPServer.__init__(self, address, PuzzleRequestHandler)
+        except BaseException:
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for f in pings:
+                f.cancel()
+            self.pool.shutdown()
+            raise
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _run(self, endpoint, query, body):
+        """Return (status, body, content type, cache hit) for a request"""
+        if endpoint == 'convert':
+            src = _inputFormat(query, 'from')
+            dst = query.get('to')
+            if dst not in WRITE_FORMATS:
+                raise HTTPError(400, f'Unknown output format: {dst}' if dst else 'Missing to')
+            data, hit = self.pool.submit(_convert, body, src, dst).result()
+            return 200, data, CONTENT_TYPES[dst], hit
+        fmt = _inputFormat(query)
+        if endpoint == 'inspect':
+            result, hit = self.pool.submit(_inspect, body, fmt).result()
+        else:
+            failFast = query.get('failFast', '').lower() in ('1', 'true', 'yes')
+            issues, hit = self.pool.submit(_validate, body, fmt, failFast).result()
+            result = {'valid': not any(i['severity'] == validate.ERROR for i in issues), 'issues': issues}
+        return 200, json.dumps(result, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8', hit
+    #END _run()
+
+    def handleRequest(self, handler, endpoint, query):
+        """Handle a POST to one of the ENDPOINTS, recording its counters"""
+        start = time.perf_counter()
+        stats = self._stats[endpoint]
+        received = sent = 0
+        hit = rejected = failed = False
+        try:
+            # the body is read first, so a rejected client still gets its response
+            body = handler._readBody()
+            received = len(body)
+            if not self._slots.acquire(blocking=False):
+                rejected = True
+                raise HTTPError(503, 'The server is busy', {'Retry-After': '1'})
+            try:
+                status, data, contentType, hit = self._run(endpoint, query, body)
+            finally:
+                self._slots.release()
+            sent = handler._send(status, data, contentType)
+        except HTTPError as e:
+            failed = not rejected
+            sent = handler._sendJSON(e.status, {'error': e.message}, e.headers)
+        except BrokenProcessPool:
+            failed = True
+            sent = handler._sendJSON(500, {'error': 'The worker pool has stopped'})
+        except Exception as e:
+            # the file couldn't be read or written
+            failed = True
+            sent = handler._sendJSON(422, {'error': f'{type(e).__name__}: {e}'})
+        elapsed = time.perf_counter() - start
+        with self._statsLock:
+            stats.requests += 1
+            stats.rejected += rejected
+            stats.errors += failed
+            stats.cacheHits += hit
+            stats.bytesIn += received
+            stats.bytesOut += sent
+            if not rejected:
+                stats.totalLatency += elapsed
+                stats.maxLatency = max(stats.maxLatency, elapsed)
+    #END handleRequest()
+
+    def statsDict(self):
+        """The counters for all the endpoints, as a dictionary"""
+        uptime = time.monotonic() - self._started
+        with self._statsLock:
+            endpoints = {endpoint: s.toDict(uptime) for endpoint, s in self._stats.items()}
+        return {'uptime': round(uptime, 3), 'workers': self.workers, 'endpoints': endpoints}
+
+    def start(self):
+        """Serve on a background (daemon) thread; returns self"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def server_close(self):
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        ThreadingHTTPServer.server_close(self)
+        self.pool.shutdown()
+#END class PuzzleServer
+
+def serve(host='127.0.0.1', port=8080, **options):
+    """Run a PuzzleServer in the foreground until interrupted"""
+    with PuzzleServer((host, port), **options) as server:
+        print(f'Serving on {server.url}', flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+#END serve()
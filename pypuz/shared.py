@@ -0,0 +1,337 @@
+"""
+Handing puzzles between processes through shared memory.
+
+A Puzzle returned from a worker process is normally pickled as a graph of
+Cell, Clue and dict objects, which can cost more than parsing the file.
+Here a batch of puzzles is packed into one multiprocessing.shared_memory
+block instead: per-cell data goes into flat arrays, and only the metadata,
+clue text and the tables of distinct strings and styles are stored as
+JSON. Only the block's name crosses the process boundary; the receiving
+side attaches to it and reads cells straight out of the arrays, building
+a Puzzle only when asked.
+
+    # in a worker
+    name = parseToShared([('puz', data1), ('ipuz', data2)])
+    # in the parent
+    with PackedPuzzles.attach(name, unlink=True) as batch:
+        for packed in batch:
+            packed.solutionAt(0, 0)
+            puzzle = packed.toPuzzle()
+
+Layout (native byte order; offsets are from the start of the block):
+    header: MAGIC, uint32 count, uint32 0, then (uint64 offset,
+    uint64 length) per puzzle
+    puzzle: uint32 JSON length, width, height, number of clue cells;
+    the JSON header (padded to 4 bytes); flags (uint8 per square, padded
+    to 4 bytes); then uint32 arrays of solution, value, number and style
+    indexes (per square, row-major) and the clue cells (x, y pairs)
+"""
+import json
+import struct
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+from .pypuz import Cell, Clue, Grid, MetaData, Puzzle, Style
+
+MAGIC = b'PYPUZSM1'
+_HEADER = struct.Struct('=8sII')
+_ENTRY = struct.Struct('=QQ')
+_RECORD = struct.Struct('=IIII')
+
+# bits in the per-square flags
+PRESENT = 1
+BLOCK = 2
+EMPTY = 4
+
+def _pad(n, k):
+    return -n % k
+
+def _packPuzzle(puzzle):
+    """Return the parts (bytes-like objects) of one packed puzzle"""
+    grid = puzzle.grid
+    w, h = grid.width, grid.height
+    n = w * h
+    # string and style tables; index 0 is None / the empty style
+    strings, stringIds = [None], {None: 0}
+    styles, styleIds = [{}], {Style.of(None): 0}
+
+    def stringId(s):
+        i = stringIds.get(s)
+        if i is None:
+            i = stringIds[s] = len(strings)
+            strings.append(s)
+        return i
+
+    flags = bytearray(n)
+    solutions = array('I', bytes(4 * n))
+    values = array('I', bytes(4 * n))
+    numbers = array('I', bytes(4 * n))
+    styleIndexes = array('I', bytes(4 * n))
+    for c in grid.cells:
+        i = c.y * w + c.x
+        if flags[i]:
+            continue
+        flags[i] = PRESENT | (BLOCK if c.isBlock else 0) | (EMPTY if c.isEmpty else 0)
+        solutions[i] = stringId(c.solution)
+        values[i] = stringId(c.value)
+        numbers[i] = stringId(c.number)
+        style = c.sharedStyle
+        k = styleIds.get(style)
+        if k is None:
+            k = styleIds[style] = len(styles)
+            styles.append(style)
+        styleIndexes[i] = k
+
+    clueCells = array('I')
+    clues = []
+    for clueList in puzzle.clues or []:
+        this = []
+        for clue in clueList['clues']:
+            if clue.cells is None:
+                this.append([clue.number, clue.clue, 0, -1])
+                continue
+            this.append([clue.number, clue.clue, len(clueCells) // 2, len(clue.cells)])
+            for x, y in clue.cells:
+                clueCells.append(x)
+                clueCells.append(y)
+        clues.append([clueList['title'], this])
+
+    metadata = dict(vars(puzzle.metadata)) if puzzle.metadata is not None else None
+    header = json.dumps({'metadata': metadata, 'strings': strings, 'styles': styles, 'clues': clues},
+                        ensure_ascii=False).encode('utf-8')
+    return [
+        _RECORD.pack(len(header), w, h, len(clueCells) // 2),
+        header, bytes(_pad(len(header), 4)),
+        flags, bytes(_pad(n, 4)),
+        solutions, values, numbers, styleIndexes, clueCells,
+    ]
+#END _packPuzzle()
+
+def packPuzzles(puzzles):
+    """
+    Pack puzzles into the shared layout.
+    Returns (list of bytes-like parts, total size).
+    """
+    records = [_packPuzzle(p) for p in puzzles]
+    offset = _HEADER.size + _ENTRY.size * len(records)
+    entries = []
+    parts = []
+    for record in records:
+        offset += _pad(offset, 8)
+        length = sum(len(memoryview(part).cast('B')) for part in record)
+        entries.append((offset, length))
+        offset += length
+    parts.append(_HEADER.pack(MAGIC, len(records), 0))
+    for entry in entries:
+        parts.append(_ENTRY.pack(*entry))
+    position = _HEADER.size + _ENTRY.size * len(records)
+    for (start, length), record in zip(entries, records):
+        parts.append(bytes(start - position))
+        parts.extend(record)
+        position = start + length
+    return parts, position
+#END packPuzzles()
+
+def toSharedMemory(puzzles):
+    """
+    Pack puzzles into a new shared memory block and return its name.
+    The block stays allocated until someone unlinks it (see PackedPuzzles).
+    """
+    parts, size = packPuzzles(puzzles)
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1), track=False)
+    except TypeError:
+        # before Python 3.13: the block belongs to whoever attaches to it, so
+        # this process's resource tracker mustn't free it when this process exits
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    try:
+        position = 0
+        for part in parts:
+            part = memoryview(part).cast('B')
+            shm.buf[position:position + len(part)] = part
+            position += len(part)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return shm.name
+#END toSharedMemory()
+
+def parseToShared(files):
+    """
+    Parse (format, data) pairs and pack the puzzles into shared memory;
+    returns the block's name. Use this as the function run by a process
+    pool, so that only the name is sent back.
+    """
+    return toSharedMemory([Puzzle().fromData(data, fmt) for fmt, data in files])
+
+class PackedPuzzle:
+    """
+    A read-only view of one puzzle in a packed block.
+    width, height, flags (per-square PRESENT/BLOCK/EMPTY bits, row-major),
+    solutions, values, numbers, styles (per-square indexes into the string
+    and style tables) and clueCells are memoryviews into the block.
+    """
+    def __init__(self, buf, views):
+        jsonLength, self.width, self.height, numClueCells = _RECORD.unpack_from(buf, 0)
+        n = self.width * self.height
+        position = _RECORD.size
+        self._header = bytes(buf[position:position + jsonLength])
+        self._parsed = None
+        position += jsonLength + _pad(jsonLength, 4)
+
+        def take(size, fmt):
+            nonlocal position
+            view = buf[position:position + size]
+            position += size
+            if fmt != 'B':
+                view = view.cast(fmt)
+            views.append(view)
+            return view
+
+        self.flags = take(n, 'B')
+        position += _pad(n, 4)
+        self.solutions = take(4 * n, 'I')
+        self.values = take(4 * n, 'I')
+        self.numbers = take(4 * n, 'I')
+        self.styles = take(4 * n, 'I')
+        self.clueCells = take(8 * numClueCells, 'I')
+
+    def _json(self):
+        if self._parsed is None:
+            self._parsed = json.loads(self._header)
+        return self._parsed
+
+    @property
+    def metadata(self):
+        """The metadata, as a dictionary"""
+        return self._json()['metadata']
+
+    @property
+    def strings(self):
+        """The string table (index 0 is None)"""
+        return self._json()['strings']
+
+    def solutionAt(self, x, y):
+        return self.strings[self.solutions[y * self.width + x]]
+
+    def valueAt(self, x, y):
+        return self.strings[self.values[y * self.width + x]]
+
+    def isBlack(self, x, y):
+        return bool(self.flags[y * self.width + x] & (BLOCK | EMPTY))
+
+    def toPuzzle(self):
+        """Build an ordinary Puzzle from the packed data"""
+        d = self._json()
+        strings = d['strings']
+        styles = [Style.of(s) for s in d['styles']]
+        md = d['metadata']
+        metadata = None
+        if md is not None:
+            metadata = MetaData(md.get('kind'))
+            metadata.__dict__.update(md)
+        w = self.width
+        cells = []
+        flags, solutions, values, numbers, styleIndexes = self.flags, self.solutions, self.values, self.numbers, self.styles
+        for i in range(w * self.height):
+            f = flags[i]
+            if not f & PRESENT:
+                continue
+            cell = Cell(i % w, i // w, value=strings[values[i]], number=strings[numbers[i]],
+                        isBlock=True if f & BLOCK else None, isEmpty=True if f & EMPTY else None,
+                        style=styles[styleIndexes[i]])
+            # solutions were stored as they were; don't let Cell() change them
+            cell.solution = strings[solutions[i]]
+            cells.append(cell)
+        clueCells = self.clueCells
+        clues = []
+        for title, clueList in d['clues']:
+            thisClues = []
+            for number, text, start, count in clueList:
+                cellList = None
+                if count >= 0:
+                    cellList = [[clueCells[2 * k], clueCells[2 * k + 1]] for k in range(start, start + count)]
+                thisClues.append(Clue(text, cellList, number=number))
+            clues.append({'title': title, 'clues': thisClues})
+        return Puzzle(metadata=metadata, grid=Grid(cells), clues=clues)
+    #END toPuzzle()
+#END class PackedPuzzle
+
+class PackedPuzzles:
+    """
+    A batch of packed puzzles, attached to a shared memory block (or any
+    buffer). Indexing gives PackedPuzzle views; close() releases them.
+    """
+    def __init__(self, buf, shm=None, unlink=False):
+        self._shm = shm
+        self._unlink = unlink
+        self._buf = memoryview(buf)
+        self._views = [self._buf]
+        magic, count, _ = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a block of packed puzzles')
+        self._entries = [_ENTRY.unpack_from(self._buf, _HEADER.size + _ENTRY.size * k) for k in range(count)]
+        self._puzzles = [None] * count
+
+    @classmethod
+    def attach(cls, name, unlink=False):
+        """
+        Attach to a shared memory block made by toSharedMemory().
+        With unlink=True, the block is freed when this is closed; otherwise
+        it stays allocated after this process exits.
+        """
+        if unlink:
+            # this process owns the block now: let its resource tracker free
+            # it if the process dies before close()
+            shm = shared_memory.SharedMemory(name=name)
+        else:
+            try:
+                shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # before Python 3.13: attaching registers the block with this
+                # process's resource tracker, which would free it at exit
+                shm = shared_memory.SharedMemory(name=name)
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm.buf, shm=shm, unlink=unlink)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, k):
+        packed = self._puzzles[k]
+        if packed is None:
+            offset, length = self._entries[k]
+            buf = self._buf[offset:offset + length]
+            self._views.append(buf)
+            packed = self._puzzles[k] = PackedPuzzle(buf, self._views)
+        return packed
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def toPuzzles(self):
+        """Build ordinary Puzzles for the whole batch"""
+        return [packed.toPuzzle() for packed in self]
+
+    def close(self):
+        """Release the views (which can't be used afterwards) and detach"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._shm is not None:
+            self._shm.close()
+            if self._unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+#END class PackedPuzzles
@@ -0,0 +1,203 @@
+"""
+Grid statistics: word and block counts, word lengths, symmetry, unchecked
+squares, two-letter words and open areas.
+
+The grid is first packed into flat, row-major arrays (open squares and bars);
+every statistic is then computed in a single pass over those arrays. For
+profiling an archive, batchStats() stacks equally sized grids into numpy
+arrays and computes the same counts for all of them at once.
+"""
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+def _layout(grid):
+    """
+    Pack a grid into flat row-major arrays:
+    isOpen (1 for letter squares), barRight and barDown (1 where a bar or the
+    edge of the grid separates a square from its right/lower neighbour),
+    and the number of blocks and voids.
+    """
+    w, h = grid.width, grid.height
+    n = w * h
+    isOpen = bytearray(n)
+    barRight = bytearray(n)
+    barDown = bytearray(n)
+    seen = bytearray(n)
+    blocks = voids = 0
+    for c in grid.cells:
+        i = c.y * w + c.x
+        if seen[i]:
+            continue
+        seen[i] = 1
+        if c.isBlock:
+            blocks += 1
+        elif c.isEmpty:
+            voids += 1
+        else:
+            isOpen[i] = 1
+        barred = c.sharedStyle.get('barred', '')
+        if barred:
+            if 'R' in barred:
+                barRight[i] = 1
+            if 'B' in barred:
+                barDown[i] = 1
+            if 'L' in barred and c.x > 0:
+                barRight[i - 1] = 1
+            if 'T' in barred and c.y > 0:
+                barDown[i - w] = 1
+    return w, h, isOpen, barRight, barDown, blocks, voids
+#END _layout()
+
+def _symmetry(isOpen, w, h):
+    """Rotational and mirror symmetry of the block pattern"""
+    rows = [bytes(isOpen[i:i + w]) for i in range(0, w * h, w)]
+    return {
+        'rotational': bytes(isOpen) == bytes(isOpen[::-1]),
+        'mirrorLeftRight': all(r == r[::-1] for r in rows),
+        'mirrorTopBottom': rows == rows[::-1],
+    }
+
+def gridStats(grid):
+    """
+    Return a dictionary of statistics for a grid:
+    width, height, blockCount, voidCount, wordCount, acrossWordCount,
+    downWordCount, averageWordLength, wordLengths (length -> count),
+    twoLetterWords, uncheckedSquares, largestOpenSquare (side of the largest
+    all-letter square), openAreas3x3 (number of all-letter 3x3 windows)
+    and symmetry (rotational, mirrorLeftRight, mirrorTopBottom).
+    """
+    w, h, isOpen, barRight, barDown, blocks, voids = _layout(grid)
+    wordLengths = {}
+    across = down = 0
+    # 1 where a square is in an across (resp. down) word of length 1
+    singleAcross = bytearray(w * h)
+    unchecked = 0
+    # running down-word lengths per column, and the open-square DP rows
+    colRun = [0] * w
+    prevSquare = [0] * w
+    largest = openAreas = 0
+
+    def endDown(x, y):
+        nonlocal down, unchecked
+        n = colRun[x]
+        colRun[x] = 0
+        if n > 1:
+            down += 1
+            wordLengths[n] = wordLengths.get(n, 0) + 1
+        elif n == 1:
+            # a lone down square: unchecked, unless already counted for across
+            if not singleAcross[(y - 1) * w + x]:
+                unchecked += 1
+
+    for y in range(h):
+        run = 0
+        square = [0] * w
+        for x in range(w):
+            i = y * w + x
+            if isOpen[i]:
+                run += 1
+                colRun[x] += 1
+                # the largest all-letter square ending here
+                if x and y:
+                    square[x] = min(square[x - 1], prevSquare[x], prevSquare[x - 1]) + 1
+                else:
+                    square[x] = 1
+                if square[x] >= 3:
+                    openAreas += 1
+                if square[x] > largest:
+                    largest = square[x]
+            else:
+                if colRun[x]:
+                    endDown(x, y)
+            # the end of an across word
+            if run and (x == w - 1 or barRight[i] or not isOpen[i + 1]):
+                if run > 1:
+                    across += 1
+                    wordLengths[run] = wordLengths.get(run, 0) + 1
+                else:
+                    singleAcross[i] = 1
+                    unchecked += 1
+                run = 0
+            # the end of a down word at a bar
+            if isOpen[i] and barDown[i] and y < h - 1:
+                endDown(x, y + 1)
+        prevSquare = square
+    for x in range(w):
+        if colRun[x]:
+            endDown(x, h)
+
+    wordCount = across + down
+    letters = sum(n * k for n, k in wordLengths.items())
+    return {
+        'width': w,
+        'height': h,
+        'blockCount': blocks,
+        'voidCount': voids,
+        'wordCount': wordCount,
+        'acrossWordCount': across,
+        'downWordCount': down,
+        'averageWordLength': letters / wordCount if wordCount else 0,
+        'wordLengths': dict(sorted(wordLengths.items())),
+        'twoLetterWords': wordLengths.get(2, 0),
+        'uncheckedSquares': unchecked,
+        'largestOpenSquare': largest,
+        'openAreas3x3': openAreas,
+        'symmetry': _symmetry(isOpen, w, h),
+    }
+#END gridStats()
+
+def batchStats(grids):
+    """
+    Statistics for many grids of the same size at once.
+    With numpy, returns a dictionary of arrays (one value per grid) for
+    blockCount, wordCount, averageWordLength, twoLetterWords,
+    uncheckedSquares and the three symmetry flags. Without numpy
+    (or for grids of mixed sizes) this is a list of gridStats() results.
+    """
+    grids = list(grids)
+    if np is None or not grids or len({(g.width, g.height) for g in grids}) > 1:
+        return [gridStats(g) for g in grids]
+
+    layouts = [_layout(g) for g in grids]
+    w, h = layouts[0][0], layouts[0][1]
+    isOpen = np.frombuffer(b''.join(bytes(l[2]) for l in layouts), dtype=np.uint8).reshape(-1, h, w).astype(bool)
+    barRight = np.frombuffer(b''.join(bytes(l[3]) for l in layouts), dtype=np.uint8).reshape(-1, h, w).astype(bool)
+    barDown = np.frombuffer(b''.join(bytes(l[4]) for l in layouts), dtype=np.uint8).reshape(-1, h, w).astype(bool)
+
+    # joinRight[n, y, x]: the square joins the one to its right in a word
+    joinRight = np.zeros_like(isOpen)
+    joinRight[:, :, :-1] = isOpen[:, :, :-1] & isOpen[:, :, 1:] & ~barRight[:, :, :-1]
+    joinLeft = np.zeros_like(isOpen)
+    joinLeft[:, :, 1:] = joinRight[:, :, :-1]
+    joinDown = np.zeros_like(isOpen)
+    joinDown[:, :-1, :] = isOpen[:, :-1, :] & isOpen[:, 1:, :] & ~barDown[:, :-1, :]
+    joinUp = np.zeros_like(isOpen)
+    joinUp[:, 1:, :] = joinDown[:, :-1, :]
+
+    acrossStarts = joinRight & ~joinLeft
+    downStarts = joinDown & ~joinUp
+    wordCount = acrossStarts.sum(axis=(1, 2)) + downStarts.sum(axis=(1, 2))
+    letters = (joinLeft | joinRight).sum(axis=(1, 2)) + (joinUp | joinDown).sum(axis=(1, 2))
+    # two-letter words: a start whose second square doesn't continue
+    nextJoinsRight = np.zeros_like(isOpen)
+    nextJoinsRight[:, :, :-1] = joinRight[:, :, 1:]
+    nextJoinsDown = np.zeros_like(isOpen)
+    nextJoinsDown[:, :-1, :] = joinDown[:, 1:, :]
+    twoLetter = (acrossStarts & ~nextJoinsRight).sum(axis=(1, 2)) + (downStarts & ~nextJoinsDown).sum(axis=(1, 2))
+    checked = (joinLeft | joinRight) & (joinUp | joinDown)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average = np.where(wordCount > 0, letters / np.maximum(wordCount, 1), 0)
+    return {
+        'blockCount': np.array([l[5] for l in layouts]),
+        'wordCount': wordCount,
+        'averageWordLength': average,
+        'twoLetterWords': twoLetter,
+        'uncheckedSquares': (isOpen & ~checked).sum(axis=(1, 2)),
+        'rotational': (isOpen == isOpen[:, ::-1, ::-1]).all(axis=(1, 2)),
+        'mirrorLeftRight': (isOpen == isOpen[:, :, ::-1]).all(axis=(1, 2)),
+        'mirrorTopBottom': (isOpen == isOpen[:, ::-1, :]).all(axis=(1, 2)),
+    }
+#END batchStats()
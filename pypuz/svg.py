@@ -0,0 +1,157 @@
+"""
+SVG rendering of grids, for previews, thumbnails and printing.
+
+The grid is drawn from export.ExportData's row-major cells in one pass.
+Runs of adjacent squares that look the same are merged: each row's run of
+blocks (or of one background colour, or of letter squares) is a single
+rectangle, and all the rectangles of a kind go into one <path>. Circles
+are one shared <defs> glyph placed with <use>, and text is styled with
+CSS classes rather than per-element attributes, so files stay small.
+
+    svg = puzzle.toSVG(solutions=True)
+    thumbnails = renderMany(puzzles, cellSize=8, numbers=False)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from xml.sax.saxutils import escape
+
+from .export import ExportData
+
+CELL_SIZE = 32
+LINE_WIDTH = 1
+BAR_WIDTH = 3
+
+def _runs(flags, w, h):
+    """Yield (x, y, length) for each horizontal run of true flags"""
+    for y in range(h):
+        x = 0
+        row = y * w
+        while x < w:
+            if flags[row + x]:
+                start = x
+                while x < w and flags[row + x]:
+                    x += 1
+                yield start, y, x - start
+            else:
+                x += 1
+
+def _rectPath(runs, s, pad):
+    return ''.join(f'M{pad + x * s} {pad + y * s}h{n * s}v{s}h{-n * s}z' for x, y, n in runs)
+
+def _number(v):
+    """Format a coordinate without a trailing .0"""
+    return str(int(v)) if v == int(v) else f'{v:.2f}'.rstrip('0')
+
+def svgString(data, cellSize=CELL_SIZE, solutions=False, numbers=True, values=False):
+    """
+    Render a puzzle (given as an ExportData) as an SVG document.
+    solutions draws the solution letters; values draws the filled-in
+    letters instead (where there is no solution shown); numbers draws the
+    clue numbers.
+    """
+    w, h = data.width, data.height
+    s = cellSize
+    pad = LINE_WIDTH / 2 if LINE_WIDTH % 2 else 0
+    total_w, total_h = w * s + 2 * pad, h * s + 2 * pad
+
+    isOpen = bytearray(w * h)
+    isBlock = bytearray(w * h)
+    colours = {}
+    circles = []
+    bars = []
+    texts = []
+    for i, c in enumerate(data.cells):
+        if c is None or c.isEmpty:
+            continue
+        x, y = i % w, i // w
+        if c.isBlock:
+            isBlock[i] = 1
+            continue
+        isOpen[i] = 1
+        style = c.sharedStyle
+        if style:
+            colour = style.get('color')
+            if colour:
+                colours.setdefault(colour, bytearray(w * h))[i] = 1
+            if style.get('shapebg') == 'circle':
+                circles.append((x, y))
+            barred = style.get('barred')
+            if barred:
+                px, py = pad + x * s, pad + y * s
+                if 'T' in barred:
+                    bars.append(f'M{_number(px)} {_number(py)}h{s}')
+                if 'B' in barred:
+                    bars.append(f'M{_number(px)} {_number(py + s)}h{s}')
+                if 'L' in barred:
+                    bars.append(f'M{_number(px)} {_number(py)}v{s}')
+                if 'R' in barred:
+                    bars.append(f'M{_number(px + s)} {_number(py)}v{s}')
+        if numbers and c.number:
+            texts.append(f'<text class="n" x="{_number(pad + x * s + s * 0.06)}" '
+                         f'y="{_number(pad + y * s + s * 0.3)}">{escape(c.number)}</text>')
+        letters = c.solution if solutions else (c.value if values else None)
+        if letters:
+            cls = 'l' if len(letters) == 1 else 'r'
+            texts.append(f'<text class="{cls}" x="{_number(pad + x * s + s / 2)}" '
+                         f'y="{_number(pad + y * s + s * 0.82)}">{escape(letters)}</text>')
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{_number(total_w)}" height="{_number(total_h)}" '
+        f'viewBox="0 0 {_number(total_w)} {_number(total_h)}">',
+        '<style>'
+        '.o{fill:#fff}'
+        f'.g{{fill:none;stroke:#000;stroke-width:{LINE_WIDTH}}}'
+        '.b{fill:#000}'
+        f'.bar{{fill:none;stroke:#000;stroke-width:{BAR_WIDTH};stroke-linecap:square}}'
+        f'.n{{font:{_number(s * 0.28)}px sans-serif}}'
+        f'.l{{font:{_number(s * 0.66)}px sans-serif;text-anchor:middle}}'
+        f'.r{{font:{_number(s * 0.3)}px sans-serif;text-anchor:middle}}'
+        '</style>',
+    ]
+    if circles:
+        out.append(f'<defs><circle id="c" cx="{_number(s / 2)}" cy="{_number(s / 2)}" '
+                   f'r="{_number(s / 2 - LINE_WIDTH)}" fill="none" stroke="#000" '
+                   f'stroke-width="{LINE_WIDTH}"/></defs>')
+    # letter squares: one rectangle per run, then any background colours,
+    # then the outlines of the runs and the lines between their squares
+    open_runs = list(_runs(isOpen, w, h))
+    squares = _rectPath(open_runs, s, pad)
+    if open_runs:
+        out.append(f'<path class="o" d="{squares}"/>')
+    for colour, flags in colours.items():
+        out.append(f'<path fill="#{escape(colour.lstrip("#"))}" d="{_rectPath(_runs(flags, w, h), s, pad)}"/>')
+    if open_runs:
+        dividers = ''.join(f'M{_number(pad + (x + k) * s)} {_number(pad + y * s)}v{s}'
+                           for x, y, n in open_runs for k in range(1, n))
+        out.append(f'<path class="g" d="{squares}{dividers}"/>')
+    block_runs = list(_runs(isBlock, w, h))
+    if block_runs:
+        out.append(f'<path class="b" d="{_rectPath(block_runs, s, pad)}"/>')
+    if bars:
+        out.append(f'<path class="bar" d="{"".join(bars)}"/>')
+    for x, y in circles:
+        out.append(f'<use xlink:href="#c" x="{_number(pad + x * s)}" y="{_number(pad + y * s)}"/>')
+    out.extend(texts)
+    out.append('</svg>\n')
+    return '\n'.join(out)
+#END svgString()
+
+def svgBytes(data, **options):
+    """Return the SVG for an ExportData as bytes"""
+    return svgString(data, **options).encode('utf-8')
+
+def _render(puzzle, options):
+    return svgBytes(ExportData(puzzle), **options)
+
+def renderMany(puzzles, workers=0, chunksize=16, **options):
+    """
+    Render many puzzles (e.g. thumbnails) with the same options; returns a
+    list of SVGs as bytes, in order. With workers > 0, the puzzles are
+    rendered on a process pool, chunksize at a time.
+    """
+    if not workers:
+        return [_render(p, options) for p in puzzles]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render, puzzles, repeat(options), chunksize=chunksize))
+#END renderMany()
@@ -0,0 +1,273 @@
+"""
+Structural validation of puzzles.
+
+Malformed files otherwise surface as KeyErrors or IndexErrors deep inside
+Puzzle.fromDict() or fromPuzObject(), after the whole parse has been paid
+for. The checks here run on the reader's output (the dictionaries made by
+file_types, or a puz.Puzzle) in one pass over the cells and clue cells, so
+bad uploads can be rejected before a Puzzle is built:
+
+    issues = validateData(data, 'ipuz')
+    if any(i.severity == ERROR for i in issues):
+        ...
+
+Each problem is reported as a ValidationIssue; with failFast=True, checking
+stops at the first error.
+"""
+from .file_types import puz, ipuz, cfp, jpz, amuselabs
+from .pypuz import clueDirection, DIRECTIONS
+
+ERROR = 'error'
+WARNING = 'warning'
+
+class ValidationIssue:
+    """
+    One problem found by validation.
+    code (a short identifier, e.g. 'cellOutOfBounds')
+    message (a human-readable description)
+    location (where the problem is, e.g. [x, y] or (title, number), or None)
+    severity (ERROR or WARNING)
+    """
+    def __init__(self, code, message, location=None, severity=ERROR):
+        self.code = code
+        self.message = message
+        self.location = location
+        self.severity = severity
+
+    def __repr__(self):
+        return f"ValidationIssue({self.severity}: {self.code}: {self.message})"
+#END class ValidationIssue
+
+class _Stop(Exception):
+    """Raised to stop at the first error in fail-fast mode"""
+
+class _Issues:
+    def __init__(self, failFast):
+        self.failFast = failFast
+        self.issues = []
+
+    def add(self, code, message, location=None, severity=ERROR):
+        self.issues.append(ValidationIssue(code, message, location, severity))
+        if self.failFast and severity == ERROR:
+            raise _Stop()
+
+def _checkGrid(width, height, cells, clueLists, inferredCells, issues):
+    """
+    The checks shared by every source.
+    cells is an iterable of (x, y, isOpen, solution, barred), and clueLists
+    a list of (title, [(number, cells)]). If inferredCells is True, clues
+    without cells are expected (their cells come from the grid).
+    """
+    if not isinstance(width, int) or not isinstance(height, int) or width <= 0 or height <= 0:
+        issues.add('dimensions', f'Invalid grid dimensions {width!r} x {height!r}')
+        return
+    n = width * height
+    seen = bytearray(n)
+    isOpen = bytearray(n)
+    barRight = bytearray(n)
+    barDown = bytearray(n)
+    count = 0
+    for x, y, this_open, solution, barred in cells:
+        count += 1
+        if not (isinstance(x, int) and isinstance(y, int) and 0 <= x < width and 0 <= y < height):
+            issues.add('cellOutOfBounds', f'Cell ({x}, {y}) is outside the {width}x{height} grid', [x, y])
+            continue
+        i = y * width + x
+        if seen[i]:
+            issues.add('duplicateCell', f'More than one cell at ({x}, {y})', [x, y])
+        seen[i] = 1
+        if this_open:
+            isOpen[i] = 1
+            if solution is not None and not isinstance(solution, str):
+                issues.add('badSolution', f'Solution at ({x}, {y}) is not a string', [x, y])
+        if barred:
+            if 'R' in barred:
+                barRight[i] = 1
+            if 'B' in barred:
+                barDown[i] = 1
+            if 'L' in barred and x > 0:
+                barRight[i - 1] = 1
+            if 'T' in barred and y > 0:
+                barDown[i - width] = 1
+    if count != n:
+        issues.add('cellCount', f'Expected {n} cells for a {width}x{height} grid, found {count}')
+    missing = n - sum(seen)
+    if missing:
+        i = seen.index(0)
+        issues.add('missingCell', f'{missing} grid position(s) have no cell, e.g. ({i % width}, {i // width})',
+                   [i % width, i // width])
+
+    # How many across and down entries the grid has
+    numEntries = [0, 0]
+    for i in range(n):
+        if not isOpen[i]:
+            continue
+        x, y = i % width, i // width
+        joinsLeft = x > 0 and isOpen[i - 1] and not barRight[i - 1]
+        joinsRight = x < width - 1 and isOpen[i + 1] and not barRight[i]
+        joinsUp = y > 0 and isOpen[i - width] and not barDown[i - width]
+        joinsDown = y < height - 1 and isOpen[i + width] and not barDown[i]
+        numEntries[0] += joinsRight and not joinsLeft
+        numEntries[1] += joinsDown and not joinsUp
+
+    for k, (title, clues) in enumerate(clueLists):
+        direction = clueDirection(title, k)
+        if direction in DIRECTIONS:
+            expected = numEntries[DIRECTIONS.index(direction)]
+            if len(clues) != expected:
+                severity = ERROR if inferredCells else WARNING
+                issues.add('clueCount', f'{len(clues)} {title} clues for {expected} {direction} entries',
+                           title, severity)
+        for number, clue_cells in clues:
+            where = (title, number)
+            if not clue_cells:
+                if not inferredCells:
+                    issues.add('clueNoCells', f'{title} {number} has no cells', where)
+                continue
+            prev = None
+            for cell in clue_cells:
+                try:
+                    x, y = cell
+                except (TypeError, ValueError):
+                    issues.add('badClueCell', f'{title} {number} has a malformed cell {cell!r}', where)
+                    break
+                if not (isinstance(x, int) and isinstance(y, int) and 0 <= x < width and 0 <= y < height):
+                    issues.add('clueCellOutOfBounds', f'{title} {number} has cell ({x}, {y}) outside the grid', where)
+                    break
+                i = y * width + x
+                if not seen[i]:
+                    issues.add('clueCellMissing', f'{title} {number} uses ({x}, {y}), which has no cell', where)
+                elif not isOpen[i]:
+                    issues.add('clueCellBlock', f'{title} {number} uses ({x}, {y}), which is a block', where)
+                if prev is not None and abs(x - prev[0]) + abs(y - prev[1]) != 1:
+                    issues.add('clueNotContiguous', f'{title} {number} is not contiguous at ({x}, {y})',
+                               where, WARNING)
+                prev = (x, y)
+#END _checkGrid()
+
+def validateDict(d, failFast=False):
+    """
+    Validate a dictionary as made by the file_types readers (the input to
+    Puzzle.fromDict). Returns a list of ValidationIssues.
+    """
+    issues = _Issues(failFast)
+    try:
+        md = d.get('metadata') if isinstance(d, dict) else None
+        if not isinstance(md, dict):
+            issues.add('metadata', 'No metadata')
+            return issues.issues
+        if 'kind' not in md:
+            issues.add('metadata', 'Metadata has no kind')
+        grid = d.get('grid') or []
+        if not grid:
+            issues.add('emptyGrid', 'The grid has no cells')
+            return issues.issues
+        width, height = md.get('width'), md.get('height')
+        if width is None or height is None:
+            # fromDict works the dimensions out from the cells
+            width = max(c.get('x', 0) for c in grid) + 1
+            height = max(c.get('y', 0) for c in grid) + 1
+        cells = ((c.get('x'), c.get('y'), not (c.get('isBlock') or c.get('isEmpty')),
+                  c.get('solution'), (c.get('style') or {}).get('barred'))
+                 for c in grid)
+        clueLists = [(cl.get('title'), [(c.get('number'), c.get('cells')) for c in cl.get('clues', [])])
+                     for cl in d.get('clues', [])]
+        _checkGrid(width, height, cells, clueLists, bool(md.get('noClueCells')), issues)
+    except _Stop:
+        pass
+    return issues.issues
+#END validateDict()
+
+def validatePuz(pz, failFast=False):
+    """
+    Validate a puz.Puzzle before it is turned into a Puzzle.
+    Returns a list of ValidationIssues.
+    """
+    issues = _Issues(failFast)
+    try:
+        n = pz.width * pz.height
+        if n <= 0:
+            issues.add('dimensions', f'Invalid grid dimensions {pz.width} x {pz.height}')
+            return issues.issues
+        for name in ('solution', 'fill'):
+            if len(getattr(pz, name)) != n:
+                issues.add('solutionLength', f'The {name} has {len(getattr(pz, name))} squares, expected {n}')
+        if len(pz.fill) != n:
+            return issues.issues
+        # the clue count must match the numbering, or fromPuz can't assign clues
+        expected = 0
+        fill = pz.fill
+        for i in range(n):
+            if puz.is_blacksquare(fill[i]):
+                continue
+            x, y = i % pz.width, i // pz.width
+            if (x == 0 or puz.is_blacksquare(fill[i - 1])) and x < pz.width - 1 and not puz.is_blacksquare(fill[i + 1]):
+                expected += 1
+            if (y == 0 or puz.is_blacksquare(fill[i - pz.width])) and y < pz.height - 1 \
+                    and not puz.is_blacksquare(fill[i + pz.width]):
+                expected += 1
+        if len(pz.clues) != expected:
+            issues.add('clueCount', f'{len(pz.clues)} clues for {expected} entries')
+        # rebus data
+        grbs = pz.extensions.get(puz.Extensions.Rebus)
+        if grbs is not None:
+            if len(grbs) != n:
+                issues.add('rebus', f'The rebus grid has {len(grbs)} squares, expected {n}')
+            else:
+                rtbl = pz.extensions.get(puz.Extensions.RebusSolutions, b'').decode(pz.encoding, 'replace')
+                try:
+                    keys = {int(k) for k in puz.parse_dict(rtbl)}
+                except ValueError:
+                    issues.add('rebus', 'The rebus table is malformed')
+                    keys = None
+                for i, b in enumerate(grbs):
+                    if not b:
+                        continue
+                    where = [i % pz.width, i // pz.width]
+                    if len(pz.solution) == n and puz.is_blacksquare(pz.solution[i]):
+                        issues.add('rebus', f'Rebus square at {where} is a black square', where)
+                    if keys is not None and b - 1 not in keys:
+                        issues.add('rebus', f'Rebus square at {where} has no entry in the rebus table', where)
+        gext = pz.extensions.get(puz.Extensions.Markup)
+        if gext is not None and len(gext) != n:
+            issues.add('markup', f'The markup grid has {len(gext)} squares, expected {n}')
+    except _Stop:
+        pass
+    return issues.issues
+#END validatePuz()
+
+def validatePuzzle(puzzle, failFast=False):
+    """Validate an already-built Puzzle. Returns a list of ValidationIssues."""
+    issues = _Issues(failFast)
+    try:
+        grid = puzzle.grid
+        if grid is None:
+            issues.add('emptyGrid', 'The puzzle has no grid')
+            return issues.issues
+        cells = ((c.x, c.y, not (c.isBlock or c.isEmpty), c.solution, c.sharedStyle.get('barred'))
+                 for c in grid.cells)
+        clueLists = [(cl['title'], [(c.number, c.cells) for c in cl['clues']]) for cl in puzzle.clues or []]
+        _checkGrid(grid.width, grid.height, cells, clueLists, False, issues)
+    except _Stop:
+        pass
+    return issues.issues
+#END validatePuzzle()
+
+def validateData(data, fmt, failFast=False):
+    """
+    Validate the contents of a file (bytes) in the given format, without
+    building a Puzzle. Returns a list of ValidationIssues; a file the
+    reader can't parse at all gives a single 'unreadable' issue.
+    """
+    readers = {'puz': puz.load, 'ipuz': ipuz.read_ipuz_data, 'jpz': jpz.read_jpz_data,
+               'cfp': cfp.read_cfp_data, 'amuselabs': amuselabs.read_amuselabs_data}
+    if fmt not in readers:
+        raise ValueError(f'Unknown input format: {fmt}')
+    try:
+        d = readers[fmt](data)
+    except Exception as e:
+        return [ValidationIssue('unreadable', f'Could not read the file: {type(e).__name__}: {e}')]
+    if fmt == 'puz':
+        return validatePuz(d, failFast=failFast)
+    return validateDict(d, failFast=failFast)
+#END validateData()
@@ -0,0 +1,27 @@
+import asyncio
+import os
+import stat
+
+from pypuz import Puzzle
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_asave_matches_save(tmp_path):
+    puzzle = Puzzle().load(os.path.join(TEST_FILES, '3x.puz'))
+    puzzle.save(str(tmp_path / 'a.puz'))
+    asyncio.run(puzzle.asave(str(tmp_path / 'b.puz')))
+    assert (tmp_path / 'a.puz').read_bytes() == (tmp_path / 'b.puz').read_bytes()
+    assert _mode(tmp_path / 'a.puz') == _mode(tmp_path / 'b.puz')
+    assert sorted(os.listdir(tmp_path)) == ['a.puz', 'b.puz']
+
+def test_asave_keeps_existing_mode(tmp_path):
+    path = tmp_path / 'x.ipuz'
+    path.write_bytes(b'')
+    os.chmod(path, 0o640)
+    puzzle = Puzzle().load(os.path.join(TEST_FILES, '3x.ipuz'))
+    asyncio.run(puzzle.asave(str(path)))
+    assert _mode(path) == 0o640
+    assert asyncio.run(Puzzle.aload(str(path))).toData('ipuz') == puzzle.toData('ipuz')
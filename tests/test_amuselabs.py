@@ -0,0 +1,15 @@
+from pypuz.file_types.amuselabs import _word_cells
+
+def test_boxes_for_word_take_precedence():
+    # a bent word: the boxes aren't a straight run from x, y
+    word = {'x': 0, 'y': 0, 'acrossNotDown': True, 'nBoxes': 3, 'word': 'ABC',
+            'boxesForWord': [{'x': 0, 'y': 0}, {'x': 1, 'y': 0}, {'x': 1, 'y': 1}]}
+    assert _word_cells(word) == [[0, 0], [1, 0], [1, 1]]
+
+def test_cells_from_position_and_length():
+    word = {'x': 2, 'y': 1, 'acrossNotDown': False, 'nBoxes': 2, 'word': 'REBUS'}
+    assert _word_cells(word) == [[2, 1], [2, 2]]
+    del word['nBoxes']
+    assert len(_word_cells(word)) == 5
+    del word['word']
+    assert _word_cells(word) is None
@@ -0,0 +1,44 @@
+import os
+
+from pypuz import Puzzle
+from pypuz.answers import AnswerIndex, puzzleAnswerSquares
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def test_match_and_count():
+    with AnswerIndex(':memory:') as index:
+        index.addAnswers(['OREO', 'AREA', 'IRAE', 'OREO'])
+        assert index.match('?RE?') == ['OREO', 'AREA']
+        assert index.match('.R.E') == ['IRAE']
+        assert index.match('??X?') == []
+        assert index.count('oreo') == 2
+        assert index.count('ERIE') == 0
+
+def test_rebus_and_plain_answers_are_kept_apart():
+    with AnswerIndex(':memory:') as index:
+        index.addAnswers([('S', 'TAR', 'T')])
+        index.addAnswers(['START', 'START'])
+        assert index.match('?????') == ['START']
+        assert index.match('S?T') == ['START']
+        assert index.count('START', 3) == 1
+        assert index.count('START', 5) == 2
+        assert index.count('START') == 3
+
+def test_rebus_answers_are_indexed_by_squares():
+    puzzle = Puzzle().load(os.path.join(TEST_FILES, '3x.puz'))
+    assert ('BA', 'NA', 'NA') in puzzleAnswerSquares(puzzle)
+    with AnswerIndex(':memory:') as index:
+        index.addPuzzle(puzzle)
+        assert 'BANANA' in index.match('???')
+        assert index.count('BANANA', 3) == 1
+
+def test_index_is_saved(tmp_path):
+    path = str(tmp_path / 'answers.db')
+    with AnswerIndex(path) as index:
+        assert index.addPuzzles([('a', Puzzle().load(os.path.join(TEST_FILES, '3x.puz')))]) == 1
+        index.addAnswers(['OREO'])
+    with AnswerIndex(path) as index:
+        assert index.hasSource('a')
+        assert index.match('O??O') == ['OREO']
+        index.addAnswers(['ORZO'])
+        assert index.match('OR?O') == ['OREO', 'ORZO']
@@ -0,0 +1,44 @@
+import pytest
+
+from pypuz import Puzzle
+from pypuz.pypuz import Cell, Grid
+from pypuz.check import CORRECT, INCORRECT
+
+def _checker():
+    # a 2x2 grid with no clues: entries come from the grid
+    cells = [Cell(0, 0, 'A'), Cell(1, 0, 'B'), Cell(0, 1, 'C'), Cell(1, 1, 'D')]
+    return Puzzle(grid=Grid(cells)).checker()
+
+def test_check_cell():
+    checker = _checker()
+    assert checker.checkCell(0, 0) is None
+    checker.setValue(0, 0, 'a')
+    assert checker.checkCell(0, 0) == CORRECT
+    checker.setValue(1, 1, 'X')
+    assert checker.checkCell(1, 1) == INCORRECT
+
+def test_corners_are_in_bounds():
+    checker = _checker()
+    checker.setValue(1, 1, 'D')
+    assert checker.checkCell(1, 1) == CORRECT
+    assert checker.checkCell(0, 0) is None
+
+@pytest.mark.parametrize('x, y', [(-1, 0), (0, -1), (-1, -1), (2, 0), (0, 2), (5, 5)])
+def test_out_of_bounds_check_cell(x, y):
+    with pytest.raises(ValueError):
+        _checker().checkCell(x, y)
+
+@pytest.mark.parametrize('x, y', [(-1, 0), (2, 1), (5, 5)])
+def test_out_of_bounds_set_value(x, y):
+    with pytest.raises(ValueError):
+        _checker().setValue(x, y, 'A')
+
+def test_out_of_bounds_update_changes_nothing():
+    checker = _checker()
+    checker.cells[3].value = 'D'
+    with pytest.raises(ValueError):
+        checker.update([(1, 1), (-1, -1)])
+    # the bad coordinate was rejected before (1, 1) was re-checked
+    assert checker.checkCell(1, 1) is None
+    assert checker.update([(1, 1)]).incorrectCells == []
+    assert checker.checkCell(1, 1) == CORRECT
@@ -0,0 +1,25 @@
+import gzip
+import json
+import os
+
+from pypuz import Puzzle
+from pypuz.dataset import clueRows, exportClues
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def _puzzle():
+    return Puzzle().load(os.path.join(TEST_FILES, '3x.puz'))
+
+def test_length_counts_squares():
+    rows = {(r['direction'], r['number']): r for r in clueRows(_puzzle())}
+    # the middle row is three rebus squares: BA, NA, NA
+    row = rows[('across', '3')]
+    assert row['answer'] == 'BANANA'
+    assert row['length'] == 3 == len(row['cells'])
+
+def test_export_jsonl(tmp_path):
+    path = tmp_path / 'clues.jsonl.gz'
+    rows = list(clueRows(_puzzle(), source='3x'))
+    assert exportClues([('3x', _puzzle())], str(path), batchSize=2) == len(rows)
+    with gzip.open(path, 'rt', encoding='utf-8') as fid:
+        assert [json.loads(line) for line in fid] == rows
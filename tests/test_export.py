@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from pypuz import Puzzle
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+SOURCES = ['3x.puz', '3x.ipuz', '3x.jpz', '3x.cfp']
+
+def _summary(puzzle):
+    """What a round trip should keep: squares, clues, circles and the main metadata"""
+    cells = sorted((c.x, c.y, c.solution, bool(c.isBlock), c.number, c.style.get('shapebg'))
+                   for c in puzzle.grid.cells)
+    clues = [(cl['title'].lower(), [(c.number, c.clue, [tuple(x) for x in c.cells]) for c in cl['clues']])
+             for cl in puzzle.clues]
+    meta = puzzle.metadata
+    return cells, clues, (meta.title, (meta.author or '').strip(), meta.width, meta.height)
+
+@pytest.mark.parametrize('source', SOURCES)
+@pytest.mark.parametrize('zipped', [False, True])
+def test_jpz_round_trip(tmp_path, source, zipped):
+    puzzle = Puzzle().load(os.path.join(TEST_FILES, source))
+    data = puzzle.toJPZ(zipped=zipped)
+    assert _summary(Puzzle().fromData(data, 'jpz')) == _summary(puzzle)
+    path = str(tmp_path / 'out.jpz')
+    puzzle.toJPZ(path, zipped=zipped)
+    assert _summary(Puzzle().load(path)) == _summary(puzzle)
+
+@pytest.mark.parametrize('source', SOURCES)
+def test_cfp_round_trip(tmp_path, source):
+    puzzle = Puzzle().load(os.path.join(TEST_FILES, source))
+    data = puzzle.toCFP()
+    assert _summary(Puzzle().fromData(data, 'cfp')) == _summary(puzzle)
+    path = str(tmp_path / 'out.cfp')
+    puzzle.toCFP(path)
+    assert _summary(Puzzle().load(path)) == _summary(puzzle)
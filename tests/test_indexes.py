@@ -0,0 +1,59 @@
+import os
+
+from pypuz import Puzzle
+from pypuz.pypuz import Cell, Clue, Grid
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def _puzzle():
+    return Puzzle().load(os.path.join(TEST_FILES, '3x.ipuz'))
+
+def test_replaced_cell_is_indexed():
+    grid = Grid([Cell(0, 0, 'A'), Cell(1, 0, 'B'), Cell(2, 0, 'C')])
+    assert grid.cellAt(1, 0).solution == 'B'
+    new = Cell(1, 0, 'Z')
+    grid.cells[1] = new
+    assert grid.cellAt(1, 0) is new
+
+def test_added_and_removed_cells_are_indexed():
+    grid = Grid([Cell(0, 0, 'A'), Cell(1, 0, 'B')])
+    assert grid.cellAt(0, 1) is None
+    new = Cell(0, 1, 'C')
+    grid.cells.append(new)
+    assert grid.cellAt(0, 1) is new
+    del grid.cells[0]
+    assert grid.cellAt(0, 0) is None
+
+def test_replaced_cell_list_is_indexed():
+    grid = Grid([Cell(0, 0, 'A')])
+    assert grid.cellAt(0, 0).solution == 'A'
+    grid.cells = [Cell(0, 0, 'B')]
+    assert grid.cellAt(0, 0).solution == 'B'
+
+def test_replaced_clue_is_indexed():
+    puzzle = _puzzle()
+    clues = puzzle.clues[0]['clues']
+    old = clues[0]
+    x, y = old.cells[0]
+    assert old in puzzle.cluesAt(x, y)
+    new = Clue('New clue', old.cells, number=old.number)
+    clues[0] = new
+    assert new in puzzle.cluesAt(x, y)
+    assert old not in puzzle.cluesAt(x, y)
+
+def test_clone_cell_index_is_cached():
+    clone = _puzzle().clone()
+    assert clone.grid.cells is clone.grid.cells
+    assert clone.grid.cellIndex() is clone.grid.cellIndex()
+    x, y = clone.grid.cells[0].x, clone.grid.cells[0].y
+    clone.grid.cellAt(x, y).value = 'Q'
+    assert clone.grid.cellIndex()[(x, y)].value == 'Q'
+
+def test_added_clue_is_indexed():
+    puzzle = _puzzle()
+    clues = puzzle.clues[1]['clues']
+    assert puzzle.clueFor('down', '99') is None
+    clues.append(Clue('Extra', [[0, 0]], number='99'))
+    assert puzzle.clueFor('down', '99').clue == 'Extra'
+    del clues[-1]
+    assert puzzle.clueFor('down', '99') is None
@@ -0,0 +1,71 @@
+import math
+import random
+
+import pytest
+
+from pypuz.file_types import puz
+
+class _OldClueNumbering:
+    """DefaultClueNumbering as it was before it was made linear, for comparison"""
+    def __init__(self, grid, clues, width, height):
+        self.grid = grid
+        self.width = width
+        self.height = height
+        a = []
+        d = []
+        c = 0
+        n = 1
+        for i in range(0, len(grid)):
+            if not puz.is_blacksquare(grid[i]):
+                lastc = c
+                is_across = self.col(i) == 0 or puz.is_blacksquare(grid[i - 1])
+                if is_across and self.len_across(i) > 1:
+                    a.append({'num': n, 'clue': clues[c], 'clue_index': c, 'cell': i, 'len': self.len_across(i)})
+                    c += 1
+                is_down = self.row(i) == 0 or puz.is_blacksquare(grid[i - width])
+                if is_down and self.len_down(i) > 1:
+                    d.append({'num': n, 'clue': clues[c], 'clue_index': c, 'cell': i, 'len': self.len_down(i)})
+                    c += 1
+                if c > lastc:
+                    n += 1
+        self.across = a
+        self.down = d
+
+    def col(self, index):
+        return index % self.width
+
+    def row(self, index):
+        return int(math.floor(index / self.width))
+
+    def len_across(self, index):
+        for c in range(0, self.width - self.col(index)):
+            if puz.is_blacksquare(self.grid[index + c]):
+                return c
+        return c + 1
+
+    def len_down(self, index):
+        for c in range(0, self.height - self.row(index)):
+            if puz.is_blacksquare(self.grid[index + c*self.width]):
+                return c
+        return c + 1
+
+def _grids():
+    rng = random.Random(0)
+    for width, height in [(1, 1), (1, 5), (5, 1), (3, 3), (5, 7), (15, 15), (21, 13)]:
+        for blacks in (0.0, 0.15, 0.4):
+            yield width, height, ''.join(rng.choice('.:') if rng.random() < blacks else 'A' for _ in range(width * height))
+
+@pytest.mark.parametrize('width, height, grid', list(_grids()))
+def test_numbering_matches_old(width, height, grid):
+    clues = [f'clue {k}' for k in range(width * height * 2)]
+    new = puz.DefaultClueNumbering(grid, clues, width, height)
+    old = _OldClueNumbering(grid, clues, width, height)
+    assert new.across == old.across
+    assert new.down == old.down
+    # every square of an entry points back at it
+    for entries, cells, step in [(new.across, new.cell_across, 1), (new.down, new.cell_down, width)]:
+        expected = [-1] * (width * height)
+        for k, e in enumerate(entries):
+            for j in range(e['len']):
+                expected[e['cell'] + j * step] = k
+        assert cells == expected
@@ -0,0 +1,69 @@
+import os
+
+from pypuz import Puzzle
+from pypuz.file_types import puz
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def _puzzle():
+    # 3x3 with blocks in two corners, rebus squares BA, NA, NA and three circles
+    return Puzzle().load(os.path.join(TEST_FILES, '3x.puz'))
+
+def test_to_puz_bytes_match_file(tmp_path):
+    puzzle = _puzzle()
+    path = str(tmp_path / 'out.puz')
+    puzzle.toPuz(path)
+    data = puzzle.toPuz()
+    assert isinstance(data, bytes)
+    with open(path, 'rb') as fid:
+        assert fid.read() == data
+    assert puz.load(data).solution == '.ADBNNAT.'
+
+def test_to_puz_shares_rebus_keys():
+    pz = puz.load(_puzzle().toPuz())
+    rebus = pz.rebus()
+    # the two NA squares share one table entry
+    assert rebus.solutions == {0: 'BA', 1: 'NA'}
+    assert rebus.table == [0, 0, 0, 1, 2, 2, 0, 0, 0]
+    assert rebus.get_rebus_squares() == [3, 4, 5]
+
+def test_to_puz_markup_is_aligned():
+    puzzle = _puzzle()
+    pz = puz.load(puzzle.toPuz())
+    markup = pz.markup()
+    # one GEXT byte per square, rebus squares included
+    assert len(markup.markup) == pz.width * pz.height
+    circled = [c.y * pz.width + c.x for c in puzzle.grid.cells if c.style.get('shapebg') == 'circle']
+    assert markup.get_markup_squares() == circled
+
+def _raw():
+    with open(os.path.join(TEST_FILES, '3x.puz'), 'rb') as fid:
+        return fid.read()
+
+def test_unparsed_extensions_round_trip():
+    raw = _raw()
+    pz = puz.load(raw)
+    # reading squares doesn't parse (or rewrite) anything
+    assert pz.rebus().get_rebus_squares() == [3, 4, 5]
+    assert pz.markup().get_markup_squares() == [2, 4, 6]
+    assert pz.tobytes() == raw
+
+def test_rebus_edits_are_saved():
+    pz = puz.load(_raw())
+    rebus = pz.rebus()
+    rebus.table[5] = 0
+    rebus.solutions[rebus.table[4] - 1] = 'NO'
+    rebus.set_rebus_fill(3, 'BA')
+    pz = puz.load(pz.tobytes())
+    rebus = pz.rebus()
+    assert rebus.get_rebus_squares() == [3, 4]
+    assert rebus.get_rebus_solution(4) == 'NO'
+    assert rebus.get_rebus_fill(3) == 'BA'
+
+def test_markup_edits_are_saved():
+    pz = puz.load(_raw())
+    markup = pz.markup()
+    markup.markup[2] = 0
+    markup.markup[7] = puz.GridMarkup.Circled
+    pz = puz.load(pz.tobytes())
+    assert pz.markup().get_markup_squares() == [4, 6, 7]
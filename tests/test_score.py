@@ -0,0 +1,54 @@
+import os
+import random
+
+import pytest
+
+from pypuz import Puzzle, score
+from pypuz.file_types import puz
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def _fills(solution, n, seed=0):
+    """Submissions near the solution: some right, some with wrong, blank or lowercase squares"""
+    rng = random.Random(seed)
+    fills = [solution, solution.lower()]
+    for _ in range(n):
+        fill = list(solution)
+        for i, c in enumerate(fill):
+            if c != '.' and rng.random() < 0.3:
+                fill[i] = rng.choice('ABCXYZ- ')
+        fills.append(''.join(fill))
+    return fills
+
+def test_numpy_and_python_scores_agree():
+    pytest.importorskip('numpy')
+    scorer = score.BulkScorer(Puzzle().load(os.path.join(TEST_FILES, '3x.ipuz')))
+    solution = scorer.solution.decode(puz.ENCODING)
+    fills = _fills(solution, 50)
+    fast, slow = scorer.score(fills), scorer._scorePython(fills)
+    assert fast.errors.tolist() == slow.errors
+    assert fast.blanks.tolist() == slow.blanks
+    assert fast.wrongMask.tolist() == slow.wrongMask
+    assert fast.entryCorrect.tolist() == slow.entryCorrect
+    assert slow.errors[:2] == [0, 0]
+
+def _locked():
+    pz = puz.Puzzle()
+    pz.width = pz.height = 4
+    pz.solution = 'CATS.HOPEDGESEAT'
+    pz.fill = ''.join('.' if c == '.' else '-' for c in pz.solution)
+    solution = pz.solution
+    pz.lock_solution(1234)
+    return pz, solution
+
+@pytest.mark.parametrize('withNumpy', [True, False])
+def test_locked_answers_agree_with_check_answers(monkeypatch, withNumpy):
+    if withNumpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(score, 'np', None)
+    pz, solution = _locked()
+    fills = _fills(solution, 50) + [pz.fill]
+    result = score.checkLockedAnswers(pz, fills)
+    assert [bool(r) for r in result] == [pz.check_answers(f) for f in fills]
+    assert bool(result[0])
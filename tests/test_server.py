@@ -0,0 +1,96 @@
+import http.client
+import json
+import os
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from pypuz import Puzzle
+from pypuz.server import PuzzleServer
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def _read(name):
+    with open(os.path.join(TEST_FILES, name), 'rb') as fid:
+        return fid.read()
+
+@pytest.fixture(scope='module')
+def server():
+    with PuzzleServer(('127.0.0.1', 0), workers=1, queueSize=0, maxBodySize=64 * 1024) as server:
+        server.start()
+        yield server
+
+def _post(server, path, body):
+    """Return (status, headers, body)"""
+    try:
+        with urlopen(Request(server.url + path, data=body, method='POST')) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def _stats(server):
+    with urlopen(server.url + '/stats') as response:
+        return json.loads(response.read())['endpoints']
+
+def test_convert(server):
+    status, headers, body = _post(server, '/convert?from=puz&to=ipuz', _read('3x.puz'))
+    assert status == 200
+    assert headers['Content-Type'] == 'application/json'
+    expected = Puzzle().load(os.path.join(TEST_FILES, '3x.puz')).toData('ipuz')
+    assert json.loads(body) == json.loads(expected)
+    # the same body again is parsed from the worker's cache
+    hits = _stats(server)['convert']['cacheHits']
+    status, _, _ = _post(server, '/convert?filename=3x.puz&to=jpz', _read('3x.puz'))
+    assert status == 200
+    assert _stats(server)['convert']['cacheHits'] == hits + 1
+
+def test_inspect(server):
+    status, _, body = _post(server, '/inspect?format=ipuz', _read('3x.ipuz'))
+    assert status == 200
+    result = json.loads(body)
+    assert (result['width'], result['height']) == (3, 3)
+    assert sum(result['clues'].values()) > 0
+
+def test_validate(server):
+    status, _, body = _post(server, '/validate?filename=x.jpz', _read('3x.jpz'))
+    assert status == 200
+    result = json.loads(body)
+    assert result['valid'] is True
+
+def test_bad_requests(server):
+    before = _stats(server)['convert']['errors']
+    assert _post(server, '/convert?from=docx&to=ipuz', b'x')[0] == 400
+    assert _post(server, '/convert?filename=x.docx&to=ipuz', b'x')[0] == 400
+    assert _post(server, '/convert?from=puz&to=docx', b'x')[0] == 400
+    assert _post(server, '/convert?from=puz', b'x')[0] == 400
+    assert _post(server, '/convert?from=puz&to=ipuz', b'not a puzzle')[0] == 422
+    assert _stats(server)['convert']['errors'] == before + 5
+    assert _post(server, '/nowhere', b'x')[0] == 404
+
+def test_body_limits(server):
+    assert _post(server, '/inspect?format=puz', b'x' * (server.maxBodySize + 1))[0] == 413
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port)
+    try:
+        conn.putrequest('POST', '/inspect?format=puz')
+        conn.endheaders()
+        assert conn.getresponse().status == 411
+    finally:
+        conn.close()
+
+def test_busy_server_rejects(server):
+    # take the only slot (workers=1, queueSize=0) as a running request would
+    before = _stats(server)['inspect']
+    server._slots.acquire()
+    try:
+        status, headers, _ = _post(server, '/inspect?format=ipuz', _read('3x.ipuz'))
+    finally:
+        server._slots.release()
+    assert status == 503
+    assert headers['Retry-After'] == '1'
+    after = _stats(server)['inspect']
+    assert after['rejected'] == before['rejected'] + 1
+    assert after['errors'] == before['errors']
+    assert after['requests'] == before['requests'] + 1
+    assert _post(server, '/inspect?format=ipuz', _read('3x.ipuz'))[0] == 200
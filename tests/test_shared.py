@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+from pypuz import Puzzle
+from pypuz import shared
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def _data(name):
+    with open(os.path.join(TEST_FILES, name), 'rb') as fid:
+        return fid.read()
+
+def test_pack_round_trip():
+    files = [('puz', _data('3x.puz')), ('ipuz', _data('3x.ipuz')), ('jpz', _data('3x.jpz'))]
+    puzzles = [Puzzle().fromData(data, fmt) for fmt, data in files]
+    parts, size = shared.packPuzzles(puzzles)
+    buf = bytearray(size)
+    position = 0
+    for part in parts:
+        part = memoryview(part).cast('B')
+        buf[position:position + len(part)] = part
+        position += len(part)
+    batch = shared.PackedPuzzles(buf)
+    try:
+        assert len(batch) == len(puzzles)
+        for packed, puzzle in zip(batch, puzzles):
+            assert (packed.width, packed.height) == (puzzle.grid.width, puzzle.grid.height)
+            assert packed.solutionAt(0, 0) == puzzle.grid.cellAt(0, 0).solution
+            assert not puzzle.diff(packed.toPuzzle())
+            assert packed.toPuzzle().toData('ipuz') == puzzle.toData('ipuz')
+    finally:
+        batch.close()
+
+def test_shared_memory_round_trip():
+    name = shared.parseToShared([('puz', _data('3x.puz'))])
+    with shared.PackedPuzzles.attach(name, unlink=True) as batch:
+        puzzle = batch[0].toPuzzle()
+    assert not Puzzle().fromData(_data('3x.puz'), 'puz').diff(puzzle)
+
+def test_block_outlives_a_reader():
+    name = shared.parseToShared([('puz', _data('3x.puz'))])
+    try:
+        code = ('from pypuz import shared\n'
+                f'with shared.PackedPuzzles.attach({name!r}) as batch:\n'
+                '    print(len(batch))\n')
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        assert result.stdout.strip() == '1'
+        assert 'leaked' not in result.stderr
+    finally:
+        # the block must still be there for its owner
+        with shared.PackedPuzzles.attach(name, unlink=True) as batch:
+            assert len(batch) == 1
@@ -0,0 +1,63 @@
+import copy
+import os
+
+import pytest
+
+from pypuz import Puzzle
+from pypuz.pypuz import Cell, Style
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'pypuz', 'test_files')
+
+def test_equal_styles_are_shared():
+    a = Cell(0, 0, 'A', style={'shapebg': 'circle'})
+    b = Cell(1, 0, 'B', style={'shapebg': 'circle'})
+    assert a.sharedStyle is b.sharedStyle
+    assert Cell(2, 0).sharedStyle is Style.of(None)
+
+def test_writes_only_change_one_cell():
+    a = Cell(0, 0, 'A', style={'shapebg': 'circle'})
+    b = Cell(1, 0, 'B', style={'shapebg': 'circle'})
+    a.style['color'] = 'FF0000'
+    assert a.style == {'shapebg': 'circle', 'color': 'FF0000'}
+    assert b.style == {'shapebg': 'circle'}
+    del a.style['shapebg']
+    assert a.sharedStyle is Style.of({'color': 'FF0000'})
+
+def test_nested_writes_only_change_one_cell():
+    style = {'mark': {'TR': '1'}, 'slice': [1, 2]}
+    a = Cell(0, 0, 'A', style=style)
+    b = Cell(1, 0, 'B', style=copy.deepcopy(style))
+    a.style['mark']['TR'] = '2'
+    a.style['slice'].append(3)
+    assert a.style == {'mark': {'TR': '2'}, 'slice': [1, 2, 3]}
+    assert b.style == style
+    assert Cell(2, 0, style=style).style == style
+    assert Cell(3, 0, style=style).sharedStyle is b.sharedStyle
+
+def test_shared_styles_are_read_only():
+    cell = Cell(0, 0, 'A', style={'mark': {'TR': '1'}, 'slice': [1, 2]})
+    with pytest.raises(TypeError):
+        cell.sharedStyle['color'] = 'FF0000'
+    with pytest.raises(TypeError):
+        cell.sharedStyle['mark']['TR'] = '2'
+    with pytest.raises(AttributeError):
+        cell.sharedStyle['slice'].append(3)
+
+def test_style_keeps_lists_and_order():
+    cell = Cell(0, 0, 'A', style={'slice': [1, 2], 'color': 'FF0000', 'barred': 'R'})
+    assert list(cell.style) == ['slice', 'color', 'barred']
+    assert isinstance(cell.style['slice'], list)
+
+def test_caller_changes_dont_leak_in():
+    style = {'mark': {'TR': '1'}}
+    cell = Cell(0, 0, 'A', style=style)
+    style['mark']['TR'] = '2'
+    assert cell.style == {'mark': {'TR': '1'}}
+
+def test_clone_style_writes_dont_change_base():
+    puzzle = Puzzle().load(os.path.join(TEST_FILES, '3x.ipuz'))
+    clone = puzzle.clone()
+    before = dict(puzzle.grid.cells[0].style)
+    clone.grid.cells[0].style['mark'] = {'TR': '9'}
+    assert clone.grid.cells[0].style['mark'] == {'TR': '9'}
+    assert puzzle.grid.cells[0].style == before